@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+import threading
+
+
+class ProbeCache:
+    """
+    持久化的音频元数据缓存（采样率、声道数、时长、编码），避免每次播放都启动ffprobe进程。
+    以绝对路径为键，文件大小或修改时间变化时自动失效。
+    """
+
+    FIELDS = ("samplerate", "channels", "duration", "codec")
+
+    def __init__(self, cache_file, max_entries=5000):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self._entries = {}  # {绝对路径: {"size", "mtime_ns", 元数据字段...}}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0  # 因文件被修改而失效的次数
+        self.load()
+
+    def load(self):
+        """从磁盘加载缓存"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    # 丢弃格式不对的条目（例如被手动修改或旧版本写入），其余照常使用
+                    self._entries = {key: entry for key, entry in data.items() if self._is_valid(entry)}
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"读取元数据缓存失败，将重新建立: {e}", file=sys.stderr)
+            self._entries = {}
+
+    def get(self, filename):
+        """查询缓存，未命中或已失效时返回 None"""
+        key = os.path.abspath(filename)
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if (not self._is_valid(entry) or entry["size"] != st.st_size
+                    or entry["mtime_ns"] != st.st_mtime_ns):
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            return {field: entry[field] for field in self.FIELDS}
+
+    @classmethod
+    def _is_valid(cls, entry):
+        """条目是否包含文件身份和全部元数据字段"""
+        return (isinstance(entry, dict) and "size" in entry and "mtime_ns" in entry
+                and all(field in entry for field in cls.FIELDS))
+
+    def put(self, filename, info):
+        """写入一条探测结果并持久化"""
+        key = os.path.abspath(filename)
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        entry.update({field: info.get(field) for field in self.FIELDS})
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            # 超出上限时淘汰最早写入的条目
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._save()
+
+    def _save(self):
+        """原子地写入缓存文件（先写临时文件再替换）"""
+        tmp_path = self.cache_file + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"保存元数据缓存失败: {e}", file=sys.stderr)
+
+    def get_stats(self):
+        """获取命中统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,91 @@
+import sounddevice as sd
+import threading
+import sys
+
+
+class OutputEngine:
+    """
+    整个会话共用的音频输出流。
+    输出流只在第一次挂载数据源时打开一次，之后一直保持运行，切歌时只替换挂载的数据源；
+    没有数据源时输出静音。数据源需实现 render(outdata, frames)，返回 False 表示播放结束。
+    """
+
+    def __init__(self, samplerate=None, channels=2, blocksize=1024, device=None):
+        self.device = device
+        self.channels = channels
+        self.blocksize = blocksize
+        # 数据源统一按设备采样率解码（由ffmpeg重采样），避免切歌时重开设备
+        self.samplerate = int(samplerate or self._query_default_samplerate(device))
+        self._stream = None
+        self._source = None
+        self._lock = threading.Lock()
+        self.xrun_count = 0  # 声卡驱动报告的输出欠载次数
+        self.stream_opens = 0  # 输出流的打开次数
+
+    @staticmethod
+    def _query_default_samplerate(device):
+        """查询输出设备的默认采样率"""
+        try:
+            return sd.query_devices(device, 'output')['default_samplerate']
+        except Exception as e:
+            print(f"查询输出设备失败，使用44100Hz: {e}", file=sys.stderr)
+            return 44100
+
+    def open(self):
+        """打开并启动输出流（已打开时不做任何事）"""
+        with self._lock:
+            if self._stream is not None:
+                return
+            stream = sd.OutputStream(
+                samplerate=self.samplerate,
+                channels=self.channels,
+                dtype='float32',
+                blocksize=self.blocksize,
+                device=self.device,
+                callback=self._callback
+            )
+            stream.start()
+            self._stream = stream
+            self.stream_opens += 1
+
+    def close(self):
+        """关闭输出流，仅在会话结束时调用"""
+        with self._lock:
+            stream, self._stream = self._stream, None
+            self._source = None
+        if stream is not None:
+            try:
+                stream.abort()
+                stream.close()
+            except Exception as e:
+                print(f"关闭输出流失败: {e}", file=sys.stderr)
+
+    def attach(self, source):
+        """挂载数据源，替换当前正在输出的数据源"""
+        self.open()
+        self._source = source
+
+    def detach(self, source):
+        """卸载数据源（仅当它仍是当前数据源时）"""
+        if self._source is source:
+            self._source = None
+
+    @property
+    def is_open(self):
+        return self._stream is not None
+
+    def _callback(self, outdata, frames, time, status):
+        if status.output_underflow:
+            self.xrun_count += 1
+        source = self._source
+        if source is None:
+            outdata.fill(0)
+            return
+        try:
+            active = source.render(outdata, frames)
+        except Exception as e:
+            print(f"播放回调错误: {e}", file=sys.stderr)
+            outdata.fill(0)
+            active = False
+        if not active and self._source is source:
+            self._source = None
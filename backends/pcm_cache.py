@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import numpy as np
+
+
+class PcmCacheEntry:
+    """
+    一条已解码的PCM缓存，数据以 (frames, channels) 的 float32 内存映射形式存放。
+    解码线程通过 append() 顺序写入，播放端只读取 decoded_frames 之前的数据。
+    """
+
+    def __init__(self, key, data_path, meta_path, data, channels, complete):
+        self.key = key
+        self.data_path = data_path
+        self.meta_path = meta_path
+        self.data = data
+        self.channels = channels
+        self.capacity = len(data)
+        self.decoded_frames = self.capacity if complete else 0
+        self.complete = complete
+        self.truncated = False  # 缓存文件无法扩大、末尾数据被丢弃
+        self.cancel_event = threading.Event()  # 不再被使用时通知解码线程退出
+        self.refcount = 0
+        self._fill_claimed = complete
+        self._lock = threading.Lock()
+
+    def claim_fill(self):
+        """声明由调用方负责解码填充，只有第一个调用者会得到 True"""
+        with self._lock:
+            if self._fill_claimed:
+                return False
+            self._fill_claimed = True
+            return True
+
+    def append(self, frames):
+        """顺序追加解码后的帧，返回实际写入的帧数"""
+        start = self.decoded_frames
+        if start + len(frames) > self.capacity and not self._grow(start + len(frames)):
+            self.truncated = True
+        n = min(len(frames), self.capacity - start)
+        if n > 0:
+            self.data[start:start + n] = frames[:n]
+            self.decoded_frames = start + n
+        return n
+
+    def _grow(self, frames_needed):
+        """
+        探测的时长偏短（VBR、文件头错误等）时扩大缓存文件并重新映射。
+        已写入的数据在文件中，新的映射可以直接读到；读取端每次都重新取 data，切换是安全的。
+        """
+        capacity = max(frames_needed, self.capacity + self.capacity // 2)
+        try:
+            self.data.flush()
+            with open(self.data_path, 'r+b') as f:
+                f.truncate(capacity * self.channels * 4)
+            data = np.memmap(self.data_path, dtype=np.float32, mode='r+', shape=(capacity, self.channels))
+        except (OSError, ValueError) as e:
+            print(f"扩大PCM缓存失败: {e}", file=sys.stderr)
+            return False
+        self.data = data
+        self.capacity = capacity
+        return True
+
+    def finish(self):
+        """解码完成：刷新数据并写入元数据，之后该缓存可被直接复用"""
+        if self.truncated:
+            # 数据不完整，不能作为完整缓存保存，下次播放时重新解码
+            print(f"PCM缓存数据不完整，已丢弃: {self.data_path}", file=sys.stderr)
+            self.complete = True
+            return
+        try:
+            self.data.flush()
+            tmp_path = self.meta_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"frames": self.decoded_frames, "channels": self.channels}, f)
+            os.replace(tmp_path, self.meta_path)
+        except OSError as e:
+            print(f"写入PCM缓存元数据失败: {e}", file=sys.stderr)
+        self.complete = True
+
+
+class PcmCache:
+    """
+    磁盘上的已解码PCM缓存，按 路径+大小+修改时间+采样格式 建立索引，
+    超出容量时按最近使用时间（LRU）淘汰最旧的缓存文件。
+    """
+
+    DATA_SUFFIX = ".f32"
+    META_SUFFIX = ".json"
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entries = {}  # 正在使用的缓存 {key: PcmCacheEntry}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(filename, samplerate, channels):
+        """根据文件身份和输出格式生成缓存键"""
+        st = os.stat(filename)
+        raw = f"{os.path.abspath(filename)}|{st.st_size}|{st.st_mtime_ns}|{samplerate}|{channels}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def acquire(self, filename, samplerate, channels, duration):
+        """获取（必要时创建）文件对应的缓存条目，用完后需调用 release()"""
+        key = self.make_key(filename, samplerate, channels)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load_entry(key, channels)
+                if entry is None:
+                    # 按时长预留空间并留出少量余量，时长探测偏短时写入过程中再扩大
+                    capacity = int((duration * 1.02 + 1.0) * samplerate)
+                    entry = self._create_entry(key, channels, capacity)
+                self._entries[key] = entry
+            entry.refcount += 1
+            return entry
+
+    def release(self, entry):
+        """释放缓存条目，最后一个使用者释放时停止未完成的解码"""
+        with self._lock:
+            entry.refcount -= 1
+            if entry.refcount > 0:
+                return
+            entry.cancel_event.set()
+            self._entries.pop(entry.key, None)
+        if entry.truncated:
+            try:
+                os.remove(entry.data_path)
+            except OSError:
+                pass
+
+    def get_stats(self):
+        """获取缓存命中与容量统计"""
+        files = self._list_data_files()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "files": len(files),
+            "size_bytes": sum(size for _, size, _ in files),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + self.DATA_SUFFIX, base + self.META_SUFFIX
+
+    def _load_entry(self, key, channels):
+        """尝试打开一条已完成的缓存"""
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            frames = int(meta["frames"])
+            if frames <= 0 or os.path.getsize(data_path) < frames * channels * 4:
+                return None
+            data = np.memmap(data_path, dtype=np.float32, mode='r', shape=(frames, channels))
+            # 更新修改时间作为LRU的最近使用时间
+            os.utime(data_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        self.hits += 1
+        return PcmCacheEntry(key, data_path, meta_path, data, channels, complete=True)
+
+    def _create_entry(self, key, channels, capacity):
+        """创建一条等待解码填充的新缓存"""
+        self.misses += 1
+        data_path, meta_path = self._paths(key)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self._evict(capacity * channels * 4)
+        data = np.memmap(data_path, dtype=np.float32, mode='w+', shape=(max(1, capacity), channels))
+        return PcmCacheEntry(key, data_path, meta_path, data, channels, complete=False)
+
+    def _list_data_files(self):
+        """列出缓存目录中的数据文件 [(key, size, mtime)]"""
+        files = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return files
+        for name in names:
+            if not name.endswith(self.DATA_SUFFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((name[:-len(self.DATA_SUFFIX)], st.st_size, st.st_mtime))
+        return files
+
+    def _evict(self, incoming_bytes):
+        """淘汰最久未使用的缓存，直到可以容纳新的数据"""
+        files = sorted(self._list_data_files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        for key, size, _ in files:
+            if total + incoming_bytes <= self.max_bytes:
+                break
+            if key in self._entries:
+                continue
+            data_path, meta_path = self._paths(key)
+            try:
+                os.remove(data_path)
+                if os.path.exists(meta_path):
+                    os.remove(meta_path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
@@ -0,0 +1,105 @@
+import threading
+import numpy as np
+
+
+class PcmRingBuffer:
+    """
+    单生产者/单消费者的 float32 PCM 环形缓冲区。
+    解码线程负责写入，音频回调负责读取；读取侧只做内存拷贝，不加锁也不阻塞。
+    """
+
+    def __init__(self, capacity_frames, channels):
+        self.capacity = max(1, int(capacity_frames))
+        self.channels = channels
+        self._buffer = np.zeros((self.capacity, channels), dtype=np.float32)
+        # 读写位置均为累计帧数（单调递增），取模后才是缓冲区下标
+        self._write_pos = 0
+        self._read_pos = 0
+        self._eof = False
+        self._space_event = threading.Event()  # 消费者读走数据后置位
+        self._data_event = threading.Event()   # 生产者写入数据后置位
+
+    @property
+    def available(self):
+        """可读取的帧数"""
+        return self._write_pos - self._read_pos
+
+    @property
+    def free(self):
+        """可写入的帧数"""
+        return self.capacity - self.available
+
+    @property
+    def eof(self):
+        """生产者是否已经写完全部数据"""
+        return self._eof
+
+    @property
+    def drained(self):
+        """数据已写完且全部被读走"""
+        return self._eof and self.available == 0
+
+    def write(self, frames, stop_event=None):
+        """写入 (N, channels) 的帧数据，缓冲区满时阻塞等待，返回实际写入的帧数"""
+        total = len(frames)
+        written = 0
+        while written < total:
+            if stop_event is not None and stop_event.is_set():
+                break
+            free = self.free
+            if free == 0:
+                # 先清除再复查，避免错过消费者在两次检查之间发出的通知
+                self._space_event.clear()
+                if self.free == 0:
+                    self._space_event.wait(0.05)
+                continue
+            n = min(free, total - written)
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self._buffer[start:start + first] = frames[written:written + first]
+            if n > first:
+                self._buffer[:n - first] = frames[written + first:written + n]
+            self._write_pos += n
+            written += n
+            self._data_event.set()
+        return written
+
+    def read_into(self, out):
+        """把尽可能多的数据拷贝到 out 的开头，返回拷贝的帧数（不阻塞）"""
+        n = min(self.available, len(out))
+        if n <= 0:
+            return 0
+        start = self._read_pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buffer[start:start + first]
+        if n > first:
+            out[first:n] = self._buffer[:n - first]
+        self._read_pos += n
+        self._space_event.set()
+        return n
+
+    def wait_for_data(self, frames, timeout=None, stop_event=None):
+        """等待缓冲区中至少有 frames 帧可读（或数据已写完），返回是否达到要求"""
+        frames = min(int(frames), self.capacity)
+        waited = 0.0
+        while self.available < frames and not self._eof:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            if timeout is not None and waited >= timeout:
+                return False
+            self._data_event.clear()
+            if self.available < frames and not self._eof:
+                self._data_event.wait(0.01)
+                waited += 0.01
+        return True
+
+    def mark_eof(self):
+        """标记生产者已写完"""
+        self._eof = True
+        self._data_event.set()
+
+    def clear(self):
+        """清空缓冲区（仅在生产者停止后调用）"""
+        self._read_pos = self._write_pos = 0
+        self._eof = False
+        self._space_event.set()
@@ -6,7 +6,256 @@ import queue
 import subprocess
 import sys
 import os
+import time
 from PyQt6.QtCore import QObject, pyqtSignal
+from .pcm_ring_buffer import PcmRingBuffer
+from .output_engine import OutputEngine
+
+
+def spawn_pcm_decoder(filename, samplerate, channels, start_seconds=0.0):
+    """启动ffmpeg，把音频解码为 f32le PCM 并输出到管道"""
+    input_stream = ffmpeg.input(filename)
+    if start_seconds > 0:
+        input_stream = ffmpeg.input(filename, ss=start_seconds)
+
+    # 构建 ffmpeg 命令
+    args = (
+        ffmpeg
+        .output(input_stream, 'pipe:', format='f32le', acodec='pcm_f32le', ac=channels, ar=samplerate)
+        .compile()
+    )
+
+    # 针对Windows平台，使用STARTUPINFO和creationflags彻底隐藏FFmpeg终端窗口
+    startupinfo = None
+    creation_flags = 0
+    if sys.platform == "win32":
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        creation_flags = subprocess.CREATE_NO_WINDOW
+
+    # 使用 subprocess.Popen 手动执行命令
+    return subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        startupinfo=startupinfo,
+        creationflags=creation_flags
+    )
+
+
+def _pump_pcm(process, channels, blocksize, sink, stop_event):
+    """从ffmpeg管道按块读取PCM交给 sink，正常读到结尾时返回 True"""
+    frame_bytes = channels * 4
+    chunk_bytes = blocksize * frame_bytes
+    try:
+        while not stop_event.is_set():
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                return True
+            usable = len(data) - len(data) % frame_bytes
+            sink(np.frombuffer(data[:usable], dtype=np.float32).reshape(-1, channels))
+    except (OSError, ValueError) as e:
+        if not stop_event.is_set():
+            print(f"解码线程错误: {e}", file=sys.stderr)
+    return False
+
+
+class _PipeSource:
+    """
+    流式数据源：解码线程把ffmpeg管道中的PCM预读到环形缓冲区，
+    音频回调只从缓冲区拷贝数据。跳转时只需重启解码进程。
+    """
+
+    def __init__(self, filename, samplerate, channels, blocksize, read_ahead_seconds):
+        self.filename = filename
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.capacity = int(max(read_ahead_seconds * samplerate, blocksize * 2))
+        self.frame = 0  # 当前读取位置（帧）
+        self._ring = None
+        self._process = None
+        self._reader = None
+        self._stop_event = None
+
+    def start(self, start_seconds=0.0):
+        """从指定时间开始解码"""
+        old = (self._process, self._reader, self._stop_event)
+        stop_event = threading.Event()
+        process = spawn_pcm_decoder(self.filename, self.samplerate, self.channels, start_seconds)
+        ring = PcmRingBuffer(self.capacity, self.channels)
+        reader = threading.Thread(target=self._reader_thread, args=(process, ring, stop_event), daemon=True)
+        reader.start()
+        self.frame = int(start_seconds * self.samplerate)
+        # 先切换到新的缓冲区再关闭旧的解码进程，回调始终能拿到有效的缓冲区
+        self._process, self._reader, self._stop_event = process, reader, stop_event
+        self._ring = ring
+        self._shutdown(*old)
+
+    def seek(self, seconds):
+        self.start(seconds)
+
+    def _reader_thread(self, process, ring, stop_event):
+        """解码线程：从ffmpeg管道读取PCM并写入环形缓冲区"""
+        if _pump_pcm(process, self.channels, self.blocksize, lambda frames: ring.write(frames, stop_event), stop_event):
+            ring.mark_eof()
+
+    def read_into(self, out):
+        n = self._ring.read_into(out)
+        self.frame += n
+        return n
+
+    @property
+    def drained(self):
+        return self._ring.drained
+
+    @property
+    def buffered_frames(self):
+        return self._ring.available if self._ring else 0
+
+    def wait_ready(self, frames, timeout=None, stop_event=None):
+        return self._ring.wait_for_data(frames, timeout, stop_event)
+
+    def close(self):
+        self._shutdown(self._process, self._reader, self._stop_event)
+        self._process = self._reader = self._stop_event = None
+
+    @staticmethod
+    def _shutdown(process, reader, stop_event):
+        if stop_event:
+            stop_event.set()
+        if process:
+            process.terminate()
+        if reader:
+            reader.join(timeout=1.0)
+
+
+class _CachedSource:
+    """
+    缓存数据源：整首曲目只解码一次，写入内存映射的PCM缓存文件，
+    播放时直接从映射区拷贝数据，跳转只需移动读取偏移。
+    """
+
+    def __init__(self, filename, samplerate, channels, blocksize, cache, duration):
+        self.filename = filename
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.frame = 0  # 当前读取位置（帧）
+        self._cache = cache
+        self._entry = cache.acquire(filename, samplerate, channels, duration)
+        self._filler = None
+
+    def start(self, start_seconds=0.0):
+        entry = self._entry
+        if entry.claim_fill():
+            self._filler = threading.Thread(target=self._fill_thread, args=(entry,), daemon=True)
+            self._filler.start()
+        self.seek(start_seconds)
+
+    def seek(self, seconds):
+        self.frame = max(0, min(int(seconds * self.samplerate), self._entry.capacity))
+
+    def _fill_thread(self, entry):
+        """解码线程：把整首曲目解码进缓存文件"""
+        process = spawn_pcm_decoder(self.filename, self.samplerate, self.channels)
+        try:
+            if _pump_pcm(process, self.channels, self.blocksize * 16, entry.append, entry.cancel_event):
+                entry.finish()
+        finally:
+            process.terminate()
+
+    def read_into(self, out):
+        entry = self._entry
+        n = min(len(out), entry.decoded_frames - self.frame)
+        if n <= 0:
+            return 0
+        out[:n] = entry.data[self.frame:self.frame + n]
+        self.frame += n
+        return n
+
+    @property
+    def drained(self):
+        return self._entry.complete and self.frame >= self._entry.decoded_frames
+
+    @property
+    def buffered_frames(self):
+        return max(0, self._entry.decoded_frames - self.frame)
+
+    def wait_ready(self, frames, timeout=None, stop_event=None):
+        waited = 0.0
+        while self.buffered_frames < frames and not self._entry.complete:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            if timeout is not None and waited >= timeout:
+                return False
+            time.sleep(0.01)
+            waited += 0.01
+        return True
+
+    def close(self):
+        if self._entry is not None:
+            self._cache.release(self._entry)
+            self._entry = None
+        if self._filler:
+            self._filler.join(timeout=1.0)
+            self._filler = None
+
+
+def probe_audio(filename):
+    """用ffprobe读取音频流的采样率、声道数、时长和编码，没有音频流时返回 None"""
+    # 针对Windows平台，隐藏ffmpeg.probe的终端窗口
+    if sys.platform == "win32":
+        # 临时设置环境变量来隐藏probe的子进程窗口
+        original_startupinfo = getattr(subprocess, '_original_startupinfo', None)
+        if not original_startupinfo:
+            subprocess._original_startupinfo = subprocess.STARTUPINFO
+
+        class HiddenStartupInfo(subprocess.STARTUPINFO):
+            def __init__(self):
+                super().__init__()
+                self.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                self.wShowWindow = subprocess.SW_HIDE
+
+        # 临时替换STARTUPINFO
+        original_popen = subprocess.Popen
+        def hidden_popen(*args, **kwargs):
+            if 'startupinfo' not in kwargs:
+                kwargs['startupinfo'] = HiddenStartupInfo()
+            if 'creationflags' not in kwargs:
+                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+            return original_popen(*args, **kwargs)
+
+        subprocess.Popen = hidden_popen
+
+        try:
+            probe = ffmpeg.probe(filename)
+        finally:
+            # 恢复原始的Popen
+            subprocess.Popen = original_popen
+    else:
+        probe = ffmpeg.probe(filename)
+
+    for stream in probe['streams']:
+        if stream['codec_type'] == 'audio':
+            duration = stream.get('duration') or probe.get('format', {}).get('duration', 0)
+            return {
+                "samplerate": int(stream['sample_rate']),
+                "channels": int(stream['channels']),
+                "duration": float(duration),
+                "codec": stream.get('codec_name', ''),
+            }
+    return None
+
+
+class _PendingTrack:
+    """已探测并预解码好开头的下一首曲目，等待无缝衔接"""
+
+    def __init__(self, filename, duration, source):
+        self.filename = filename
+        self.duration = duration
+        self.source = source
+
 
 class AudioPlayer(QObject):
     """
@@ -14,152 +263,231 @@ class AudioPlayer(QObject):
     """
     # 定义信号
     playback_finished = pyqtSignal()  # 播放结束信号
+    track_changed = pyqtSignal(str)  # 无缝切换到预加载的下一首时发出，参数为新曲目路径
 
-    def __init__(self, filename, blocksize=1024, device=None):
+    def __init__(self, filename, blocksize=1024, device=None, read_ahead_seconds=2.0, prefill_seconds=0.25,
+                 pcm_cache=None, preload_seconds=3.0, engine=None, probe_cache=None):
         super().__init__()
         self.filename = filename
         self.blocksize = blocksize
         self.device = device
+        # 共享的输出流；未提供时创建一个仅供本实例使用的输出流
+        self._owns_engine = engine is None
+        self._engine = engine or OutputEngine(blocksize=blocksize, device=device)
+        self.read_ahead_seconds = read_ahead_seconds  # 解码线程最多领先播放的秒数
+        self.prefill_seconds = prefill_seconds  # 打开输出流前预先缓冲的秒数
+        self.pcm_cache = pcm_cache  # 可选的PCM缓存，提供时整首解码一次并支持即时跳转
+        self.preload_seconds = preload_seconds  # 下一首预先解码的秒数
+        self.probe_cache = probe_cache  # 可选的元数据缓存，命中时无需启动ffprobe
         self._thread = None
         self._stop_event = threading.Event()
         self._pause_event = threading.Event()
         self._pause_event.set()
-        self._stream = None
         self._samplerate = 44100
         self._channels = 2
-        self._data_queue = queue.Queue(maxsize=10)  # 用于存储音频数据
+        self._source_samplerate = 0  # 文件本身的采样率
+        self._codec = ""
+        self._data_queue = queue.Queue(maxsize=32)  # 用于存储音频数据（供频谱分析取用）
+        self.capture_enabled = True  # 是否复制音频块供频谱分析
         self._duration = 0
         self._position = 0
         self._seek_time = -1 # 用于记录跳转时间
+        self._seek_lock = threading.Lock()  # 数据源就绪前后的跳转交接
         self._is_finished = False  # 添加播放完成标志
         self._volume = 1.0  # 音量, 0.0 到 1.0
+        self._source = None  # 当前数据源（流式或缓存）
+        self._underrun_count = 0  # 回调时缓冲区数据不足的次数
+        self._underrun_frames = 0  # 因数据不足而补静音的帧数
+        # --- 无缝播放 ---
+        self._next_lock = threading.Lock()  # 保护下一首的交接，持有时间极短
+        self._next_track = None  # 已就绪的下一首 _PendingTrack
+        self._next_request = None  # 当前请求预加载的下一首路径
+        self._retired_sources = []  # 已播完、等待在播放线程中关闭的数据源
+        self._started_event = threading.Event()  # 探测完成、输出格式确定后置位
+
+    def _probe_file(self, filename):
+        """探测音频元数据，优先使用元数据缓存"""
+        cache = self.probe_cache
+        if cache is not None:
+            info = cache.get(filename)
+            if info is not None:
+                return info
+        info = probe_audio(filename)
+        if cache is not None and info:
+            cache.put(filename, info)
+        return info
 
     def _probe(self):
         try:
-            # 针对Windows平台，隐藏ffmpeg.probe的终端窗口
-            if sys.platform == "win32":
-                # 临时设置环境变量来隐藏probe的子进程窗口
-                original_startupinfo = getattr(subprocess, '_original_startupinfo', None)
-                if not original_startupinfo:
-                    subprocess._original_startupinfo = subprocess.STARTUPINFO
-                    
-                class HiddenStartupInfo(subprocess.STARTUPINFO):
-                    def __init__(self):
-                        super().__init__()
-                        self.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        self.wShowWindow = subprocess.SW_HIDE
-                
-                # 临时替换STARTUPINFO
-                original_popen = subprocess.Popen
-                def hidden_popen(*args, **kwargs):
-                    if 'startupinfo' not in kwargs:
-                        kwargs['startupinfo'] = HiddenStartupInfo()
-                    if 'creationflags' not in kwargs:
-                        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                    return original_popen(*args, **kwargs)
-                
-                subprocess.Popen = hidden_popen
-                
-                try:
-                    probe = ffmpeg.probe(self.filename)
-                finally:
-                    # 恢复原始的Popen
-                    subprocess.Popen = original_popen
-            else:
-                probe = ffmpeg.probe(self.filename)
-                
-            for stream in probe['streams']:
-                if stream['codec_type'] == 'audio':
-                    self._samplerate = int(stream['sample_rate'])
-                    self._channels = int(stream['channels'])
-                    self._duration = float(stream['duration'])
-                    return
+            info = self._probe_file(self.filename)
+            if info:
+                self._source_samplerate = info["samplerate"]
+                self._duration = info["duration"]
+                self._codec = info["codec"]
         except Exception as e:
             print(f"探测音频文件失败: {e}", file=sys.stderr)
             raise
 
+    def _open_source(self, filename, duration):
+        """根据配置创建数据源，缓存不可用时退回流式解码"""
+        if self.pcm_cache is not None and duration > 0:
+            try:
+                return _CachedSource(filename, self._samplerate, self._channels, self.blocksize,
+                                     self.pcm_cache, duration)
+            except (OSError, ValueError) as e:
+                print(f"PCM缓存不可用，改用流式解码: {e}", file=sys.stderr)
+        return _PipeSource(filename, self._samplerate, self._channels, self.blocksize,
+                           self.read_ahead_seconds)
+
     def _play_thread(self):
         try:
             self._probe()
-            
-            # 根据是否有跳转需求，构建ffmpeg输入
-            input_stream = ffmpeg.input(self.filename)
-            if self._seek_time > 0:
-                input_stream = ffmpeg.input(self.filename, ss=self._seek_time)
-                self._position = self._seek_time # 更新当前播放位置
+            # 按输出流的格式解码，采样率不同时由ffmpeg重采样
+            self._samplerate = self._engine.samplerate
+            self._channels = self._engine.channels
+
+            source = self._open_source(self.filename, self._duration)
+            with self._seek_lock:
+                start_seconds = max(0, self._seek_time)
                 self._seek_time = -1 # 重置跳转标记
+            source.start(start_seconds)
+            with self._seek_lock:
+                if self._seek_time >= 0:
+                    # 启动数据源期间又收到了跳转
+                    start_seconds, self._seek_time = self._seek_time, -1
+                    source.seek(start_seconds)
+                self._position = start_seconds # 更新当前播放位置
+                self._source = source
+            self._started_event.set()
+            # 先缓冲一小段数据再挂载到输出流，避免开头就欠载
+            source.wait_ready(self.prefill_seconds * self._samplerate, timeout=2.0, stop_event=self._stop_event)
+            if self._stop_event.is_set():
+                return
 
-            # 构建 ffmpeg 命令
-            args = (
-                ffmpeg
-                .output(input_stream, 'pipe:', format='f32le', acodec='pcm_f32le', ac=self._channels, ar=self._samplerate)
-                .compile()
-            )
-
-            # 针对Windows平台，使用STARTUPINFO和creationflags彻底隐藏FFmpeg终端窗口
-            startupinfo = None
-            creation_flags = 0
-            if sys.platform == "win32":
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                creation_flags = subprocess.CREATE_NO_WINDOW
-
-            # 使用 subprocess.Popen 手动执行命令
-            process = subprocess.Popen(
-                args, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.DEVNULL,
-                startupinfo=startupinfo,
-                creationflags=creation_flags
-            )
-
-            def callback(outdata, frames, time, status):
-                if not self._pause_event.is_set():
-                    outdata[:] = np.zeros(outdata.shape, dtype=np.float32)
-                    return
-                try:
-                    data = process.stdout.read(frames * self._channels * 4)
-                    if len(data) < frames * self._channels * 4:
-                        outdata[:len(data)//(4*self._channels)] = np.frombuffer(data, dtype=np.float32).reshape(-1, self._channels)
-                        self._is_finished = True
-                        self.playback_finished.emit()  # 发送播放结束信号
-                        raise sd.CallbackStop()
-                    audio_data = np.frombuffer(data, dtype=np.float32).reshape(-1, self._channels)
-                    outdata[:] = audio_data * self._volume  # 应用音量
-                    self._position = self._position + len(audio_data) / self._samplerate
-                    # 将音频数据放入队列
-                    if self._data_queue.full():
-                        try:
-                            self._data_queue.get_nowait()
-                        except queue.Empty:
-                            pass
-                    self._data_queue.put_nowait(audio_data)
-                except Exception as e:
-                    print(f"播放回调错误: {e}", file=sys.stderr)
-                    raise sd.CallbackStop()
-
-            with sd.OutputStream(
-                samplerate=self._samplerate,
-                channels=self._channels,
-                dtype='float32',
-                blocksize=self.blocksize,
-                device=self.device,
-                callback=callback
-            ) as stream:
-                self._stream = stream
-                while stream.active and not self._stop_event.is_set():
-                    sd.sleep(100)
+            self._engine.attach(self)
+            # 播放期间负责关闭已播完的数据源
+            while not self._stop_event.is_set() and not self._is_finished:
+                self._stop_event.wait(0.1)
+                self._close_retired_sources()
         except Exception as e:
             print(f"播放线程错误: {e}", file=sys.stderr)
         finally:
-            if 'process' in locals():
-                process.terminate()
-            self._stream = None
+            self._engine.detach(self)
+            source, self._source = self._source, None
+            if source is not None:
+                self._retired_sources.append(source)
+            self.queue_next(None)
+            self._close_retired_sources()
+
+    def render(self, outdata, frames):
+        """由输出流回调调用，填充一块音频数据，返回 False 表示播放结束"""
+        if not self._pause_event.is_set():
+            outdata.fill(0)
+            return True
+        # 回调中只从数据源拷贝内存，不直接读管道
+        source = self._source
+        if source is None:
+            outdata.fill(0)
+            return True
+        n = source.read_into(outdata)
+        if n < frames and source.drained:
+            # 当前曲目结束，若下一首已就绪则在同一回调块内接上
+            source = self._splice_next_track()
+            if source is not None:
+                n += source.read_into(outdata[n:])
+        if n < frames:
+            outdata[n:] = 0
+            if source is None or source.drained:
+                if n:
+                    outdata[:n] *= self._volume
+                self._is_finished = True
+                self.playback_finished.emit()  # 发送播放结束信号
+                return False
+            self._underrun_count += 1
+            self._underrun_frames += frames - n
+        if n == 0:
+            return True
+        if self.capture_enabled:
+            # 将音频数据放入队列
+            audio_data = outdata[:n].copy()
+            if self._data_queue.full():
+                try:
+                    self._data_queue.get_nowait()
+                except queue.Empty:
+                    pass
+            self._data_queue.put_nowait(audio_data)
+        outdata[:n] *= self._volume  # 应用音量
+        self._position = source.frame / self._samplerate
+        return True
+
+    def _splice_next_track(self):
+        """在音频回调中切换到已就绪的下一首，返回新的数据源（没有则返回 None）"""
+        with self._next_lock:
+            pending, self._next_track = self._next_track, None
+            if pending is None:
+                return None
+            self._next_request = None
+        self._retired_sources.append(self._source)
+        self.filename = pending.filename
+        self._duration = pending.duration
+        self._source = pending.source
+        self.track_changed.emit(pending.filename)
+        return pending.source
+
+    def _close_retired_sources(self):
+        """关闭已播完的数据源（会终止解码进程，不能在音频回调中进行）"""
+        while self._retired_sources:
+            self._retired_sources.pop().close()
+
+    def queue_next(self, filename):
+        """
+        预加载下一首：在后台探测并解码开头几秒，当前曲目结束时在同一输出流中无缝衔接。
+        传入 None 取消已有的预加载。
+        """
+        with self._next_lock:
+            if filename == self._next_request:
+                return
+            self._next_request = filename
+            stale, self._next_track = self._next_track, None
+        if stale is not None:
+            stale.source.close()
+        if filename:
+            threading.Thread(target=self._preload_thread, args=(filename,), daemon=True).start()
+
+    def get_queued_next(self):
+        """获取当前请求预加载的下一首路径"""
+        return self._next_request
+
+    def _preload_thread(self, filename):
+        """后台预加载线程：探测下一首并预解码开头部分"""
+        source = None
+        try:
+            info = self._probe_file(filename)
+            # 等待当前曲目确定输出格式
+            if not info or not self._started_event.wait(5.0):
+                return
+            # 下一首同样按输出流的采样率和声道数解码（由ffmpeg重采样），才能直接拼接
+            source = self._open_source(filename, info["duration"])
+            source.start(0)
+            source.wait_ready(self.preload_seconds * self._samplerate, timeout=5.0, stop_event=self._stop_event)
+            pending = _PendingTrack(filename, info["duration"], source)
+            with self._next_lock:
+                if self._next_request == filename and not self._stop_event.is_set():
+                    self._next_track = pending
+                    source = None
+        except Exception as e:
+            print(f"预加载下一首失败: {e}", file=sys.stderr)
+        finally:
+            if source is not None:
+                source.close()
 
-    def play(self):
+    def play(self, start_seconds=0.0):
+        """开始播放，start_seconds 为起始位置（秒），在播放线程启动前设置，不会丢失"""
         if self._thread and self._thread.is_alive():
             return
+        self._seek_time = max(0, start_seconds) if start_seconds else -1
         self._stop_event.clear()
+        self._started_event.clear()
         self._pause_event.set()
         self._is_finished = False  # 重置播放完成标志
         self._thread = threading.Thread(target=self._play_thread, daemon=True)
@@ -173,26 +501,28 @@ class AudioPlayer(QObject):
 
     def stop(self):
         self._stop_event.set()
-        if self._stream:
-            try:
-                self._stream.abort()
-            except Exception:
-                pass
+        self._engine.detach(self)
         if self._thread:
             self.resume() # 确保线程不是卡在pause上
             self._thread.join(timeout=1.0)
+        if self._owns_engine:
+            self._engine.close()
         self._is_finished = False  # 重置播放完成标志
         self._position = 0 # 停止后位置归零
 
     def seek(self, position_seconds):
         """跳转到指定时间点"""
         if self._thread and self._thread.is_alive():
-            self._seek_time = max(0, position_seconds)
-            
-            # 停止当前播放线程，以便用新的seek时间重启
-            self.stop()
-            # 重新开始播放
-            self.play()
+            position_seconds = max(0, position_seconds)
+            with self._seek_lock:
+                source = self._source
+                if source is None:
+                    # 数据源尚未就绪，交给播放线程在启动时处理
+                    self._seek_time = position_seconds
+                    return
+            # 缓存模式下只移动读取偏移；流式模式只重启解码进程，输出流保持不变
+            source.seek(position_seconds)
+            self._position = position_seconds
 
     def set_volume(self, volume):
         """设置音量 (0.0 to 1.0)"""
@@ -204,9 +534,30 @@ class AudioPlayer(QObject):
             return self._data_queue.get_nowait()
         except queue.Empty:
             return None
+
+    def set_capture_enabled(self, enabled):
+        """开启或关闭音频块的复制（关闭频谱分析时不再产生任何分析数据）"""
+        self.capture_enabled = enabled
+        if not enabled:
+            self.drain_audio_data()
+
+    def drain_audio_data(self):
+        """按时间顺序取出队列中全部的音频数据块"""
+        blocks = []
+        try:
+            while True:
+                blocks.append(self._data_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return blocks
         
     def get_duration(self):
         return self._duration
+
+    def get_source_format(self):
+        """获取文件本身的采样率和编码（输出时可能被重采样）"""
+        return {"samplerate": self._source_samplerate, "codec": self._codec,
+                "output_samplerate": self._samplerate}
     
     def get_position(self):
         return self._position
@@ -215,6 +566,22 @@ class AudioPlayer(QObject):
         """检查是否播放完成"""
         return self._is_finished
 
+    @property
+    def underrun_count(self):
+        """音频回调遇到缓冲区数据不足的次数"""
+        return self._underrun_count
+
+    def get_underrun_stats(self):
+        """获取缓冲区欠载统计信息"""
+        source = self._source
+        return {
+            "underruns": self._underrun_count,
+            "underrun_frames": self._underrun_frames,
+            "device_xruns": self._engine.xrun_count,
+            "buffered_seconds": source.buffered_frames / self._samplerate if source else 0.0,
+            "read_ahead_seconds": self.read_ahead_seconds,
+        }
+
 class AudioRecorder:
     def __init__(self, samplerate=44100, channels=1, blocksize=1024, device=None, loopback=False):
         self.samplerate = samplerate
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import queue
+import sys
+import threading
+import numpy as np
+from .sd_ffmpeg_provider import spawn_pcm_decoder
+from .spectrum_processor import BandAnalyzer
+
+
+class SpectrogramTimeline:
+    """一首曲目预计算好的频谱时间线，形状为 (帧数, 频谱条数) 的 float16 数组"""
+
+    def __init__(self, data, frame_rate):
+        self.data = data
+        self.frame_rate = frame_rate
+
+    def lookup(self, position):
+        """按播放位置（秒）取出对应帧的频谱高度"""
+        if len(self.data) == 0:
+            return None
+        index = min(max(int(position * self.frame_rate), 0), len(self.data) - 1)
+        return self.data[index].astype(np.float64)
+
+
+class SpectrogramCache:
+    """
+    离线频谱缓存：后台线程把整首曲目按固定帧率分析一次（与实时分析相同的窗函数和分箱），
+    结果以 float16 的 .npy 文件保存，播放时以内存映射方式按位置查表。
+    """
+
+    def __init__(self, cache_dir, config, frame_rate, max_files=500):
+        self.cache_dir = cache_dir
+        self.config = config
+        self.frame_rate = frame_rate
+        self.max_files = max_files
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._jobs = queue.Queue()
+        self._pending = set()  # 已排队或正在计算的缓存键
+        self._wanted = set()  # 仍需要计算的曲目，其余排队中的任务跳过、正在计算的中止
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _key(self, filename):
+        """缓存键同时包含文件身份和分析参数，参数变化后自动重新计算"""
+        st = os.stat(filename)
+        config = self.config
+        raw = (f"{os.path.abspath(filename)}|{st.st_size}|{st.st_mtime_ns}|{config.SAMPLE_RATE}|"
+               f"{config.FFT_WINDOW_SIZE}|{config.NUM_BARS}|{config.MAX_FREQ}|"
+               f"{config.SPECTRUM_BAND_REDUCTION}|{self.frame_rate}")
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".npy")
+
+    def load(self, filename):
+        """读取已有的频谱缓存，不存在时返回 None"""
+        try:
+            path = self._path(self._key(filename))
+            if not os.path.exists(path):
+                return None
+            data = np.load(path, mmap_mode='r')
+            os.utime(path)  # 记录最近使用时间
+            return SpectrogramTimeline(data, self.frame_rate)
+        except (OSError, ValueError) as e:
+            print(f"读取频谱缓存失败: {e}", file=sys.stderr)
+            return None
+
+    def request(self, filename, on_ready=None):
+        """
+        获取曲目的频谱时间线：已有缓存时直接返回，
+        否则排队后台计算并返回 None，计算完成后调用 on_ready(filename, timeline)。
+        """
+        timeline = self.load(filename)
+        if timeline is not None:
+            return timeline
+        try:
+            key = self._key(filename)
+        except OSError:
+            return None
+        with self._lock:
+            self._wanted.add(filename)
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+            self._jobs.put((filename, key, on_ready))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+        return None
+
+    def retain(self, filenames):
+        """只保留这些曲目（通常是当前曲目和下一首）的计算任务，快速切歌时不会堆积整首解码"""
+        with self._lock:
+            self._wanted = set(filenames)
+
+    def _is_wanted(self, filename):
+        with self._lock:
+            return filename in self._wanted
+
+    def _worker(self):
+        """后台计算线程，逐个处理排队的曲目"""
+        while True:
+            try:
+                filename, key, on_ready = self._jobs.get(timeout=5.0)
+            except queue.Empty:
+                with self._lock:
+                    if self._jobs.empty():
+                        self._thread = None
+                        return
+                continue
+            try:
+                if not self._compute(filename, key):
+                    continue
+                timeline = self.load(filename)
+                if timeline is not None and on_ready is not None:
+                    on_ready(filename, timeline)
+            except Exception as e:
+                print(f"预计算频谱失败: {e}", file=sys.stderr)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+    def _compute(self, filename, key):
+        """流式解码整首曲目并按固定帧率计算频谱时间线，曲目不再需要时中止并返回 False"""
+        analyzer = BandAnalyzer(self.config)
+        frame_size = analyzer.frame_size
+        hop = self.config.SAMPLE_RATE / self.frame_rate
+        offsets = np.arange(frame_size)
+        chunk_bytes = int(hop * 256) * 4
+        # 第 k 帧取以 k/frame_rate 秒结束的一个窗口，与实时分析“最近一块数据”的语义一致；
+        # 开头补一个窗口长度的静音
+        buf = np.zeros(frame_size, dtype=np.float32)
+        buf_start = -frame_size  # buf[0] 对应的全局样本序号
+        total = 0
+        k = 0
+        parts = []
+        if not self._is_wanted(filename):
+            return False
+        # 由ffmpeg混合为单声道，实时分析对音频块做同样的混合
+        process = spawn_pcm_decoder(filename, self.config.SAMPLE_RATE, 1)
+        try:
+            while True:
+                if not self._is_wanted(filename):
+                    return False
+                data = process.stdout.read(chunk_bytes)
+                if data:
+                    samples = np.frombuffer(data[:len(data) - len(data) % 4], dtype=np.float32)
+                    buf = np.concatenate([buf, samples])
+                    total += len(samples)
+                # 计算所有窗口已经完整的帧；读到结尾时按总长度截止
+                limit = int(total / hop) if not data else int((buf_start + len(buf)) / hop) + 1
+                ends = (np.arange(k, limit) * hop).astype(np.intp)
+                ends = ends[ends <= buf_start + len(buf)]
+                if len(ends):
+                    idx = ends[:, None] - frame_size - buf_start + offsets
+                    parts.append(analyzer.analyze(buf[idx]).astype(np.float16))
+                    k += len(ends)
+                    # 丢弃之后的帧不再需要的样本
+                    drop = max(0, int(k * hop) - frame_size - buf_start)
+                    buf = buf[drop:]
+                    buf_start += drop
+                if not data:
+                    break
+        finally:
+            process.terminate()
+
+        heights = np.concatenate(parts) if parts else np.zeros((0, analyzer.num_bars), dtype=np.float16)
+        self._evict()
+        path = self._path(key)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, heights)
+        os.replace(tmp_path, path)
+        return True
+
+    def _evict(self):
+        """缓存文件超出数量上限时删除最久未使用的文件"""
+        try:
+            files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                     if name.endswith(".npy") and not name.endswith(".tmp.npy")]
+            if len(files) < self.max_files:
+                return
+            files.sort(key=os.path.getmtime)
+            for path in files[:len(files) - self.max_files + 1]:
+                os.remove(path)
+        except OSError as e:
+            print(f"清理频谱缓存失败: {e}", file=sys.stderr)
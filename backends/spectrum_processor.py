@@ -4,45 +4,169 @@ import numpy as np
 import time
 
 
+class BandAnalyzer:
+    """
+    把一帧音频样本转换为频谱条高度（加窗、FFT、频段归约、对数缩放）。
+    实时分析和离线预计算共用同一个分析器，保证两者结果一致。
+    """
+
+    def __init__(self, config, frame_size=None, sample_rate=None):
+        self.config = config
+        self.frame_size = frame_size or self.config.FFT_WINDOW_SIZE
+        self.sample_rate = sample_rate or self.config.SAMPLE_RATE
+        self.num_bars = self.config.NUM_BARS
+        self._window = np.hanning(self.frame_size)
+        self._init_fft_bins()
+
+    def _init_fft_bins(self):
+        """预计算FFT频率分箱的索引，以及向量化分段归约所需的索引计划。"""
+        full_xf = np.fft.rfftfreq(self.frame_size, 1.0 / self.sample_rate)
+
+        linear_base = np.linspace(0, 1, self.num_bars + 1)
+        non_linear_base = linear_base**1.2  # 使用与player.py相同的非线性因子
+        max_edge_freq = min(self.config.MAX_FREQ, full_xf[-1])
+        bar_edges = max_edge_freq * non_linear_base
+
+        self.bin_indices = np.searchsorted(full_xf, bar_edges)
+        self.bin_indices = np.clip(self.bin_indices, 0, len(full_xf) - 1)
+
+        # 非空频段的起点。频段边界单调不减，相邻非空频段首尾相接，
+        # 因此可以直接作为 ufunc.reduceat 的分段起点，一次调用完成所有频段的归约
+        starts = self.bin_indices[:-1]
+        ends = self.bin_indices[1:]
+        valid = starts < ends
+        self._valid_bands = np.flatnonzero(valid)
+        self._reduce_starts = starts[valid]
+        self._reduce_end = int(ends[valid][-1]) if valid.any() else 0
+        self._band_sizes = (ends - starts)[valid]
+
+        # 空频段（低频处频段比FFT分辨率还窄）按频段中心频率从相邻频段线性插值，
+        # 插值的左右邻居和权重预先算好，单帧和批量计算都只需一次索引
+        self._has_empty_bands = not valid.all()
+        if self._has_empty_bands and len(self._valid_bands) > 0:
+            centers = (bar_edges[:-1] + bar_edges[1:]) / 2
+            pos = np.interp(centers, centers[self._valid_bands], np.arange(len(self._valid_bands)))
+            self._interp_left = np.floor(pos).astype(np.intp)
+            self._interp_right = np.minimum(self._interp_left + 1, len(self._valid_bands) - 1)
+            self._interp_weight = pos - self._interp_left
+
+    def _reduce_bands(self, mag):
+        """把FFT幅度谱（最后一维为频率）归约为每个频段的高度（全向量化，无逐频段循环）。"""
+        if len(self._valid_bands) == 0:
+            return np.zeros(mag.shape[:-1] + (self.num_bars,))
+        segment = mag[..., :self._reduce_end]
+        if self.config.SPECTRUM_BAND_REDUCTION == "mean":
+            reduced = np.add.reduceat(segment, self._reduce_starts, axis=-1) / self._band_sizes
+        else:
+            reduced = np.maximum.reduceat(segment, self._reduce_starts, axis=-1)
+        if not self._has_empty_bands:
+            return reduced
+        left = reduced[..., self._interp_left]
+        right = reduced[..., self._interp_right]
+        return left + (right - left) * self._interp_weight
+
+    def analyze(self, frames):
+        """
+        计算频谱条高度（对数刻度）。
+        frames 为一帧 (frame_size,) 或多帧 (n, frame_size) 样本，返回 (num_bars,) 或 (n, num_bars)。
+        """
+        fft = np.fft.rfft(frames * self._window, axis=-1)
+        mag = np.abs(fft) / self.frame_size
+        heights = self._reduce_bands(mag)
+        # 对数缩放
+        return 4e2 * np.log(1 + np.sqrt(heights))
+
+
 class SpectrumProcessor:
-    """负责频谱数据的处理和计算。"""
+    """
+    负责频谱数据的处理和计算。
+    输入的音频块先进入滚动的样本历史，再按固定跳步（hop）做重叠的短时傅里叶变换，
+    分析窗口大小和跳步与音频回调的块大小无关。处理线程阻塞等待输入，空闲时不占用CPU。
+    """
 
-    def __init__(self, config, input_queue):
+    def __init__(self, config, input_queue, metrics=None):
         self.config = config
         self._input_queue = input_queue
+        self.metrics = metrics  # 可选的性能统计（PerfMetrics），记录FFT耗时
         self._output_queue = queue.Queue(maxsize=2)
         self._thread = None
         self.running = False
 
         self._last_db_heights = None
-        self._window = np.hanning(self.config.CHUNK_SIZE)
-        self._init_fft_bins()
-        
+        self.window_size = self.config.FFT_WINDOW_SIZE
+        self.hop_size = self.config.FFT_HOP_SIZE
+        self.frame_rate = self.config.SPECTRUM_FRAME_RATE
+        self._analyzer = BandAnalyzer(self.config, self.window_size)
+        self._history = np.zeros(self.window_size, dtype=np.float32)  # 最近的样本
+        self._samples_since_frame = 0  # 上一帧之后新到达的样本数
+        self._timeline = None  # 预计算的频谱时间线，存在时按播放位置查表代替实时分析
+        self._position = None  # 最近一次收到的播放位置
+        self.wakeups = 0  # 处理线程被唤醒的次数
+        self.timeout_wakeups = 0  # 因等待超时（到了下一帧的时间或输出衰减帧）而唤醒的次数
+        self.frames_emitted = 0  # 输出的频谱帧数
+        self._output_starts = None  # 输出条数少于频段数时，每个输出条对应的起始频段
+        self.input_overflows = 0  # 输入队列已满而丢弃的输入数
+        self.output_overflows = 0  # 输出队列已满而丢弃的旧帧数
+
         # 新增：缓存三角函数值以避免重复计算
         self._precomputed_angles = np.pi / 2 + np.linspace(0, 2 * np.pi, self.config.NUM_BARS, endpoint=False)
         self._cos_cache = np.cos(self._precomputed_angles)
         self._sin_cache = np.sin(self._precomputed_angles)
 
-    def _init_fft_bins(self):
-        """预计算FFT频率分箱的索引。"""
-        full_xf = np.fft.rfftfreq(self.config.CHUNK_SIZE, 1.0 / self.config.SAMPLE_RATE)
-
-        linear_base = np.linspace(0, 1, self.config.NUM_BARS + 1)
-        non_linear_base = linear_base**1.2  # 使用与player.py相同的非线性因子
-        max_edge_freq = min(self.config.MAX_FREQ, full_xf[-1])
-        bar_edges = max_edge_freq * non_linear_base
-
-        self.bin_indices = np.searchsorted(full_xf, bar_edges)
-        self.bin_indices = np.clip(self.bin_indices, 0, len(full_xf) - 1)
-
     def get_processed_data_queue(self):
         """返回用于获取处理后数据的队列。"""
         return self._output_queue
 
+    def set_sample_rate(self, sample_rate):
+        """设置输入音频的采样率（与输出设备一致），重新计算频率分箱。"""
+        if sample_rate != self._analyzer.sample_rate:
+            self._analyzer = BandAnalyzer(self.config, self.window_size, sample_rate)
+
+    def set_hop_size(self, hop_size):
+        """设置STFT跳步（样本数），跳步越大每秒分析的帧数越少"""
+        self.hop_size = max(1, int(hop_size))
+
+    def set_output_bars(self, num_bars):
+        """设置输出的频谱条数，少于分析的频段数时把相邻频段按峰值合并"""
+        full = self.config.NUM_BARS
+        num_bars = min(max(1, int(num_bars)), full)
+        if num_bars == full:
+            self._output_starts = None
+        else:
+            self._output_starts = np.linspace(0, full, num_bars + 1).astype(np.intp)[:-1]
+
+    def set_timeline(self, timeline):
+        """设置当前曲目的预计算频谱时间线，传入 None 退回实时分析。"""
+        self._timeline = timeline
+
+    @property
+    def has_timeline(self):
+        return self._timeline is not None
+
+    def feed_audio(self, samples):
+        """提交一块单声道音频样本用于实时分析。"""
+        self._put_input(("audio", samples))
+
+    def feed_position(self, position):
+        """提交当前播放位置（秒），有预计算时间线时据此查表。"""
+        self._put_input(("position", position))
+
+    def _put_input(self, item):
+        try:
+            self._input_queue.put(item, block=False)
+        except queue.Full:
+            self.input_overflows += 1
+
     def start(self):
         """启动处理线程。"""
         if self.running:
             return
+        # 丢弃停止期间残留的输入（包括上次停止时的唤醒消息）
+        try:
+            while True:
+                self._input_queue.get_nowait()
+        except queue.Empty:
+            pass
         self.running = True
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
@@ -50,52 +174,142 @@ class SpectrumProcessor:
     def stop(self):
         """停止处理线程。"""
         self.running = False
+        # 唤醒可能正在阻塞等待输入的线程
+        self._put_input(("stop", None))
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=1.0)
 
-    def _get_latest_data_from_queue(self):
-        """从队列中获取最新数据，丢弃旧数据。"""
-        latest_data = None
+    def _append_history(self, samples):
+        """把新样本追加到滚动历史，只保留计算待处理帧所需的部分。"""
+        self._samples_since_frame += len(samples)
+        keep = self.window_size + self._samples_since_frame
+        self._history = np.concatenate([self._history, samples])[-keep:]
+
+    def _analyze_pending_frames(self):
+        """对历史中所有已凑满一个跳步的帧做STFT，返回这些帧的峰值（没有新帧时返回 None）。"""
+        hop = self.hop_size
+        total = self._samples_since_frame // hop
+        if total == 0:
+            return None
+        # 积压过多（例如界面卡顿后）时只分析最近一秒内的帧
+        count = min(total, max(1, int(self._analyzer.sample_rate / hop)))
+        # 历史中最早一个待处理样本之前至少保留了一个完整窗口
+        base = len(self._history) - self._samples_since_frame
+        ends = base + hop * (np.arange(total - count, total) + 1)
+        self._samples_since_frame -= total * hop
+        idx = ends[:, None] - self.window_size + np.arange(self.window_size)
+        # 两次输出之间的多个帧取峰值，避免丢失瞬态
+        start = time.perf_counter()
+        heights = self._analyzer.analyze(self._history[idx]).max(axis=0)
+        if self.metrics is not None:
+            self.metrics.record("fft", time.perf_counter() - start)
+        return heights
+
+    def _consume_input(self, item):
+        """处理一条输入：音频样本进入历史，播放位置记录下来用于查表。"""
+        kind, payload = item
+        if kind == "audio":
+            if self._timeline is None:
+                self._append_history(payload)
+        elif kind == "position":
+            self._position = payload
+
+    def _compute_db_heights(self):
+        """根据已收到的输入计算本次输出的频谱高度，没有新的可用数据时返回 None。"""
+        timeline = self._timeline
+        if timeline is not None:
+            position, self._position = self._position, None
+            return timeline.lookup(position) if position is not None else None
+        return self._analyze_pending_frames()
+
+    def _emit(self, heights):
+        starts = self._output_starts
+        if starts is not None:
+            heights = np.maximum.reduceat(heights, starts)
         try:
-            while True:
-                latest_data = self._input_queue.get_nowait()
-        except queue.Empty:
+            # 丢弃旧数据，放入新数据
+            if self._output_queue.full():
+                self._output_queue.get_nowait()
+                self.output_overflows += 1
+            self._output_queue.put(heights, block=False)
+            self.frames_emitted += 1
+        except queue.Full:
             pass
-        return latest_data
+
+    @property
+    def idle(self):
+        """衰减已经结束且没有待取的输出帧"""
+        return self._last_db_heights is None and self._output_queue.empty()
+
+    def get_stats(self):
+        """获取线程唤醒与输出统计，用于验证空闲时不再唤醒"""
+        return {
+            "wakeups": self.wakeups,
+            "timeout_wakeups": self.timeout_wakeups,
+            "frames_emitted": self.frames_emitted,
+            "input_overflows": self.input_overflows,
+            "output_overflows": self.output_overflows,
+            "idle": self._last_db_heights is None,
+        }
 
     def _run(self):
-        """循环处理音频数据。"""
+        """
+        事件驱动的处理循环：阻塞等待输入，有数据且到了下一帧的时间才计算，
+        输出不超过 SPECTRUM_FRAME_RATE（两帧之间到达的输入只累积，到时一并分析）。
+        输入停止后按帧率输出衰减帧，衰减到零后不再设置超时，空闲时不会被唤醒。
+        """
+        interval = 1.0 / self.frame_rate
+        next_frame = 0.0  # 下一帧最早的输出时间
+        pending = False  # 已收到但尚未分析的输入
         while self.running:
-            raw_data = self._get_latest_data_from_queue()
-
-            if raw_data is None:
-                # 没有新数据时，让旧的高度缓慢下降
-                if self._last_db_heights is not None:
-                    self._last_db_heights *= 0.9
-                    try:
-                        self._output_queue.put(self._last_db_heights, block=False)
-                    except queue.Full:
-                        pass
-                time.sleep(0.01)
-                continue
+            if pending or self._last_db_heights is not None:
+                timeout = max(0.0, next_frame - time.perf_counter())
+            else:
+                timeout = None
+            try:
+                item = self._input_queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            self.wakeups += 1
+            if item is not None and item[0] == "stop":
+                break
 
-            # 处理音频数据
-            processed_data = raw_data * self._window
-            fft = np.fft.rfft(processed_data)
-            mag = np.abs(fft) / self.config.CHUNK_SIZE
+            if item is not None:
+                # 一次唤醒取出队列中的全部输入
+                self._consume_input(item)
+                try:
+                    while True:
+                        item = self._input_queue.get_nowait()
+                        if item[0] == "stop":
+                            self.running = False
+                            break
+                        self._consume_input(item)
+                except queue.Empty:
+                    pass
+                pending = True
+                if self.running and time.perf_counter() < next_frame:
+                    # 还没到下一帧，继续累积输入
+                    continue
+            else:
+                self.timeout_wakeups += 1
 
-            # 计算频谱高度
-            heights = np.zeros(self.config.NUM_BARS)
-            for i in range(self.config.NUM_BARS):
-                start_idx = self.bin_indices[i]
-                end_idx = self.bin_indices[i + 1]
-                if start_idx < end_idx and end_idx <= len(mag):
-                    segment = mag[start_idx:end_idx]
-                    if segment.size > 0:
-                        heights[i] = np.max(segment)
+            if not pending:
+                # 没有新数据时，让旧的高度缓慢下降，降到阈值以下时归零并进入空闲
+                if self._last_db_heights is None:
+                    continue
+                self._last_db_heights = self._last_db_heights * 0.9
+                if self._last_db_heights.max() < self.config.SPECTRUM_DECAY_FLOOR:
+                    self._emit(np.zeros_like(self._last_db_heights))
+                    self._last_db_heights = None
+                else:
+                    self._emit(self._last_db_heights.copy())
+                next_frame = time.perf_counter() + interval
+                continue
 
-            # 对数缩放
-            db_heights = 4e2 * np.log(1 + np.sqrt(heights))
+            pending = False
+            db_heights = self._compute_db_heights()
+            if db_heights is None:
+                continue
 
             # 平滑处理
             if self._last_db_heights is not None:
@@ -104,13 +318,7 @@ class SpectrumProcessor:
                 display_heights = db_heights
 
             self._last_db_heights = display_heights.copy()
+            self._emit(display_heights)
+            next_frame = time.perf_counter() + interval
 
-            try:
-                # 丢弃旧数据，放入新数据
-                if self._output_queue.full():
-                    self._output_queue.get_nowait()
-                self._output_queue.put(display_heights, block=False)
-            except queue.Full:
-                pass
-
-        print("频谱处理线程已停止。") 
\ No newline at end of file
+        print("频谱处理线程已停止。")
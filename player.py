@@ -1,7 +1,6 @@
 import sys
 import numpy as np
 import pyqtgraph as pg
-import json
 import os
 import queue
 from PyQt6.QtWidgets import (
@@ -11,12 +10,16 @@ from PyQt6.QtWidgets import (
     QLineEdit, QMessageBox, QGraphicsDropShadowEffect, QSlider,
     QDialog, QFormLayout, QTextBrowser, QComboBox, QMenu, QInputDialog
 )
-from PyQt6.QtCore import QTimer, Qt, QPropertyAnimation, QEasingCurve, QSize, pyqtSignal, QUrl
-from PyQt6.QtGui import QPalette, QBrush, QLinearGradient, QColor, QPainter, QIcon, QPen, QFont, QPixmap, QCursor, QDesktopServices
+from PyQt6.QtCore import QTimer, QEvent, Qt, QPropertyAnimation, QEasingCurve, QSize, pyqtSignal, QUrl
+from PyQt6.QtGui import QPalette, QBrush, QLinearGradient, QColor, QPainter, QIcon, QPen, QFont, QPixmap, QCursor, QDesktopServices, QShortcut, QKeySequence
 from PyQt6.QtSvg import QSvgRenderer
 from backends.sd_ffmpeg_provider import AudioPlayer
 from backends.bilibili_downloader import BilibiliDownloader
 from backends.spectrum_processor import SpectrumProcessor
+from backends.pcm_cache import PcmCache
+from backends.output_engine import OutputEngine
+from backends.metadata_cache import ProbeCache
+from backends.spectrogram_cache import SpectrogramCache
 import time
 
 # 导入拆分的组件
@@ -24,12 +27,14 @@ from utils import (
     Config, ASSETS_PATH, CONFIG_PATH,
     PlaylistManager, SpectrumWidget, GradientWidget,
     CircularProgressBar, VolumeSlider, AddMusicDialog,
-    SettingsDialog, CollapsiblePlaylist,
+    SettingsDialog, CollapsiblePlaylist, PerfMetrics, PerfOverlay, TaskScheduler, SettingsStore, ShuffleEngine, PlayQueue,
     create_icon, format_time, get_icon_path
 )
 
 
 class PlayerWindow(QMainWindow):
+    spectrogram_ready = pyqtSignal(str, object)  # 后台预计算的频谱完成 (路径, 时间线)
+
     def __init__(self):
         super().__init__()
         self.config = Config()
@@ -47,24 +52,44 @@ class PlayerWindow(QMainWindow):
         ]
         self.current_play_mode_index = 0
         self.play_mode = self.play_modes[self.current_play_mode_index]
-        self.playlist_history = []  # 用于随机播放时记录历史
         self.current_index = -1  # 当前播放的索引
-        self.is_playing = False # 在setup_ui之前初始化状态
+        self._gapless_next = None  # 已请求预加载的下一首 (路径, 索引, 是否来自队列)
+        self._next_prepared = False  # 本曲目的下一首是否已经预判过（队列、模式或列表变化时重新预判）
+        self._is_playing = False # 在setup_ui之前初始化状态
 
         # 先只加载设置数据，不应用到UI控件
         self.load_settings_data()
         
         # 初始化播放列表管理器（必须在setup_ui之前）
         self.playlist_manager = PlaylistManager(CONFIG_PATH)
+        # 随机播放顺序，随播放列表的增删同步，状态保存在单独的文件中
+        self.shuffle = ShuffleEngine(self.config.SHUFFLE_HISTORY_LIMIT)
+        self.shuffle_store = SettingsStore(self.config.SHUFFLE_STATE_FILE)
+        # 播放队列、播放历史和当前曲目的播放位置（增量保存，重启后从原处继续）
+        self.play_queue = PlayQueue(CONFIG_PATH, self.config.PLAY_HISTORY_LIMIT)
+        self._saved_position = 0.0  # 最近一次保存的播放位置
+        self._resume = None  # 启动时待恢复的 (路径, 位置)，开始播放该曲目时跳转
+        # 界面刷新循环的性能统计（必须在setup_ui之前）
+        self.perf_metrics = PerfMetrics(self.config.PERF_METRICS_WINDOW)
+        self._last_tick_time = None
 
         self.setup_ui()
         self.setup_audio()
         
         # 创建音频数据队列和频谱处理器
-        self.audio_queue = queue.Queue(maxsize=10)
-        self.spectrum_processor = SpectrumProcessor(self.config, self.audio_queue)
-        self.spectrum_processor.start()
-        self.performance_mode_enabled = False
+        self.audio_queue = queue.Queue(maxsize=32)
+        self.spectrum_processor = SpectrumProcessor(self.config, self.audio_queue, self.perf_metrics)
+        self.spectrum_processor.set_sample_rate(self.output_engine.samplerate)
+        # 处理线程按性能档位启动（见 set_performance_profile）
+        self.performance_profile = None
+        self.analysis_enabled = False
+        # 离线预计算频谱缓存，播放时按位置查表，尚未计算完成时使用实时分析
+        self.spectrogram_cache = None
+        if self.config.SPECTROGRAM_CACHE_ENABLED:
+            self.spectrogram_cache = SpectrogramCache(
+                Config.SPECTROGRAM_CACHE_DIR, self.config, self.config.SPECTRUM_FRAME_RATE
+            )
+        self.spectrogram_ready.connect(self.on_spectrogram_ready)
         
         # 初始化BilibiliDownloader（在加载设置之后）
         download_path = self.settings.get("download_path", Config.DEFAULT_DOWNLOAD_PATH)
@@ -74,8 +99,11 @@ class PlayerWindow(QMainWindow):
         # UI创建完成后，应用设置到UI控件
         self.apply_settings_to_ui()
         
-        # 根据设置恢复播放列表选中项
+        # 根据设置恢复播放列表选中项和随机播放顺序
         self.restore_last_played_track()
+        self.restore_shuffle_state()
+        if self.play_queue.resume_path and self.play_queue.resume_position > 0:
+            self._resume = (self.play_queue.resume_path, self.play_queue.resume_position)
 
     def setup_ui(self):
         # 全局字体美化
@@ -91,7 +119,7 @@ class PlayerWindow(QMainWindow):
         main_layout.setSpacing(0)
         
         # 创建背景渐变部件
-        self.bg_widget = GradientWidget()
+        self.bg_widget = GradientWidget(metrics=self.perf_metrics)
         self.bg_widget.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         main_layout.addWidget(self.bg_widget)
         
@@ -106,13 +134,18 @@ class PlayerWindow(QMainWindow):
         control_panel.setObjectName("ControlPanel")
         self.playlist = CollapsiblePlaylist(self, self.playlist_manager)
         self.playlist.play_signal.connect(self.play_file)
-        self.playlist.performance_mode_toggled.connect(self.toggle_performance_mode)
+        self.playlist.performance_profile_selected.connect(self.set_performance_profile)
         self.playlist.add_music_requested.connect(self.open_add_music_dialog)
         self.playlist.add_to_next_play_requested.connect(self.add_to_next_play)
+        self.playlist.add_to_play_later_requested.connect(self.add_to_play_later)
         # 连接设置按钮信号
         self.playlist.settings_btn.clicked.connect(self.open_settings)
         # 连接播放列表选择变化信号
-        self.playlist.playlist_widget.itemSelectionChanged.connect(self.on_playlist_selection_changed)
+        self.playlist.selection_changed.connect(self.on_playlist_selection_changed)
+        # 播放列表的增删同步到随机播放顺序
+        self.playlist.model.rowsInserted.connect(self.on_playlist_rows_inserted)
+        self.playlist.model.rowsAboutToBeRemoved.connect(self.on_playlist_rows_about_to_be_removed)
+        self.playlist.model.modelReset.connect(self.on_playlist_reset)
         # 连接定位当前歌曲信号
         self.playlist.locate_current_song_requested.connect(self.locate_current_song)
         control_layout.addWidget(self.playlist)
@@ -136,7 +169,7 @@ class PlayerWindow(QMainWindow):
         spectrum_main_layout.setContentsMargins(0, 0, 0, 0)
 
         # 频谱部件
-        self.spectrum = SpectrumWidget(self.config)
+        self.spectrum = SpectrumWidget(self.config, self.perf_metrics)
         spectrum_main_layout.addWidget(self.spectrum, 0, 0)
 
         # 进度条覆盖层
@@ -240,17 +273,38 @@ class PlayerWindow(QMainWindow):
         
         self.bg_widget.setLayout(content_layout)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_spectrum)
-        self.timer.start(self.config.UI_UPDATE_INTERVAL_MS)
-
-        self.bg_timer = QTimer()
-        self.bg_timer.timeout.connect(self.update_background)
+        # 所有周期任务由调度器统一管理，按窗口状态和播放状态降频或暂停；
+        # 未列出的状态（如窗口隐藏时的频谱和背景）不会唤醒
+        self.scheduler = TaskScheduler(self, self.perf_metrics)
+        ui_interval = self.config.UI_UPDATE_INTERVAL_MS
+        self.scheduler.add_task("spectrum", self.update_spectrum,
+                                {"playing": ui_interval, "paused": ui_interval}, precise=True)
+        self.scheduler.add_task("progress", self.update_progress, {
+            "playing": ui_interval,
+            "paused": self.config.PROGRESS_PAUSED_INTERVAL_MS,
+            # 最小化时仍需低频检查进度，以便提前准备无缝播放的下一首
+            "hidden_playing": self.config.PROGRESS_HIDDEN_INTERVAL_MS,
+        })
+        bg_interval = int(1000 / self.config.BACKGROUND_FPS)
+        self.scheduler.add_task("background", self.update_background,
+                                {"playing": bg_interval, "paused": bg_interval})
+        flush_delay = self.config.SETTINGS_FLUSH_DELAY_MS
+        self.scheduler.add_task("settings_flush", self.flush_settings, {
+            "playing": flush_delay, "paused": flush_delay,
+            "hidden_playing": flush_delay, "hidden_paused": flush_delay,
+        })
+        self.scheduler.set_enabled("settings_flush", False)  # 有未保存的修改时才启用
+        self.scheduler.set_playing(self.is_playing)
         self.bg_phase = 0
-        self.bg_timer.start(100)
 
         self.stop_btn.setEnabled(False)
 
+        # 性能统计覆盖层及其快捷键
+        self.perf_overlay = PerfOverlay(self.perf_metrics, self)
+        self.perf_overlay.move(10, 10)
+        QShortcut(QKeySequence(self.config.PERF_OVERLAY_SHORTCUT), self, activated=self.perf_overlay.toggle)
+        QShortcut(QKeySequence(self.config.PERF_DUMP_SHORTCUT), self, activated=self.dump_perf_metrics)
+
         # 连接进度条跳转信号
         self.progress_bar.seek_requested.connect(self.seek_playback)
 
@@ -259,14 +313,86 @@ class PlayerWindow(QMainWindow):
         # 样式现在完全由QSS文件控制
 
     def update_background(self):
-        self.bg_phase = (self.bg_phase + 0.01) % (2 * np.pi)
+        step = self.config.BACKGROUND_PHASE_SPEED / self.config.BACKGROUND_FPS
+        self.bg_phase = (self.bg_phase + step) % (2 * np.pi)
         self.bg_widget.bg_phase = self.bg_phase
 
+    @property
+    def is_playing(self):
+        return self._is_playing
+
+    @is_playing.setter
+    def is_playing(self, value):
+        self._is_playing = value
+        if hasattr(self, "scheduler"):
+            self.scheduler.set_playing(value)
+
+    def refresh_window_state(self):
+        """把窗口是否可见（未最小化、未隐藏、未被遮挡）通知调度器"""
+        window = self.windowHandle()
+        visible = (self.isVisible() and not self.isMinimized()
+                   and (window is None or window.isExposed()))
+        self.scheduler.set_window_visible(visible)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange and hasattr(self, "scheduler"):
+            self.refresh_window_state()
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # 窗口在其他虚拟桌面或被完全遮挡时不会改变窗口状态，只能通过曝光事件得知
+        window = self.windowHandle()
+        if window is not None and not getattr(self, "_expose_filter_installed", False):
+            window.installEventFilter(self)
+            self._expose_filter_installed = True
+        self.refresh_window_state()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_window_state()
+
     def setup_audio(self):
         """初始化音频播放器"""
         self.player = None
         self.current_file = None
         self.start_time = time.time()
+        # 整个会话共用一个输出流，切歌时不再重新打开音频设备
+        self.output_engine = OutputEngine(
+            samplerate=self.config.OUTPUT_SAMPLE_RATE,
+            channels=self.config.OUTPUT_CHANNELS,
+            blocksize=self.config.CHUNK_SIZE,
+        )
+        self.pcm_cache = None
+        self.update_pcm_cache()
+        # 持久化的ffprobe元数据缓存，重复播放无需再启动探测进程
+        self.probe_cache = ProbeCache(Config.PROBE_CACHE_FILE)
+
+    def update_pcm_cache(self):
+        """根据设置启用或关闭解码缓存"""
+        enabled = self.settings.get("pcm_cache_enabled", Config.PCM_CACHE_ENABLED)
+        if enabled and self.pcm_cache is None:
+            try:
+                self.pcm_cache = PcmCache(Config.PCM_CACHE_DIR, Config.PCM_CACHE_MAX_MB * 1024 * 1024)
+            except OSError as e:
+                print(f"无法启用解码缓存: {e}")
+        elif not enabled:
+            self.pcm_cache = None
+
+    def create_player(self, file_path):
+        """按配置创建音频播放器实例"""
+        player = AudioPlayer(
+            file_path,
+            blocksize=self.config.CHUNK_SIZE,
+            read_ahead_seconds=self.config.AUDIO_READ_AHEAD_SECONDS,
+            prefill_seconds=self.config.AUDIO_PREFILL_SECONDS,
+            pcm_cache=self.pcm_cache,
+            preload_seconds=self.config.GAPLESS_PRELOAD_SECONDS,
+            engine=self.output_engine,
+            probe_cache=self.probe_cache,
+        )
+        player.set_capture_enabled(self.analysis_enabled)
+        return player
 
     def load_file(self, file_path):
         self.current_file = file_path
@@ -275,49 +401,194 @@ class PlayerWindow(QMainWindow):
         if self.player:
             self.player.stop()
             self.player = None
-        self.player = AudioPlayer(self.current_file)
+        self.player = self.create_player(self.current_file)
         self.player.play()
         self.stop_btn.setText("停止")
         self.is_playing = True
         self.update_play_pause_icon()
         # 清空频谱
-        self.spectrum.update_spectrum(np.zeros(self.config.NUM_BARS), self.start_time)
+        self.spectrum.update_spectrum(np.zeros(self.spectrum.num_bars), self.start_time)
         self.time_label.setText("00:00 / 00:00")
 
     def play_file(self, file_path):
         """播放指定文件，并持久化最后播放曲目"""
         if self.player:
             self.player.stop()
-        self.player = AudioPlayer(file_path)
+        self._gapless_next = None
+        self._next_prepared = False
+        self.player = self.create_player(file_path)
         # 同步音量到新的播放器实例
         self.player.set_volume(self.volume_slider.value() / 100.0)
-        self.current_file = file_path
-        self.player.play()
+        # 重启后第一次播放上次的曲目时，从上次的位置继续
+        resume, self._resume = self._resume, None
+        self.player.play(resume[1] if resume and resume[0] == file_path else 0.0)
         self.is_playing = True
-        self.update_play_pause_icon()
         self.stop_btn.setEnabled(True)
         # 清空频谱
-        self.spectrum.update_spectrum(np.zeros(self.config.NUM_BARS), self.start_time)
-        
-        # 更新当前索引并选中对应的播放列表项
-        for i in range(self.playlist.playlist_widget.count()):
-            item = self.playlist.playlist_widget.item(i)
-            if item and item.data(Qt.ItemDataRole.UserRole) == file_path:
-                self.current_index = i
-                self.playlist.playlist_widget.setCurrentRow(i)
-                break
+        self.spectrum.update_spectrum(np.zeros(self.spectrum.num_bars), self.start_time)
                 
         # 连接播放结束信号
         self.player.playback_finished.connect(self.on_playback_finished)
-        # 记录并保存最后播放文件
+        self.player.track_changed.connect(self.on_player_track_changed)
+        self.on_track_started(file_path)
+
+    def on_track_started(self, file_path):
+        """曲目开始播放后更新当前索引、选中项并记录最后播放文件"""
+        self.current_file = file_path
+        # 更新当前索引并选中对应的播放列表项
+        row = self.playlist.row_of(file_path)
+        if row >= 0:
+            self.current_index = row
+            self.playlist.set_current_row(row)
+            if self.play_mode == "random":
+                self.advance_shuffle_to(file_path)
+        self.update_play_pause_icon()
+        self.load_spectrogram(file_path)
+        # 记录最后播放文件，稍后统一写入
         self.settings["last_played_file"] = file_path
-        self.save_settings()
+        self.mark_settings_dirty()
+        self.play_queue.record_played(file_path)
+        self._saved_position = 0.0
+
+    def load_spectrogram(self, file_path):
+        """切换到曲目的预计算频谱；尚未计算时排队后台计算，期间使用实时分析"""
+        timeline = None
+        if self.spectrogram_cache:
+            # 之前曲目尚未完成的计算不再需要，快速切歌时不会排起一串整首解码
+            self.spectrogram_cache.retain([file_path] if self.analysis_enabled else [])
+            if self.analysis_enabled:
+                timeline = self.spectrogram_cache.request(file_path, self.spectrogram_ready.emit)
+        self.spectrum_processor.set_timeline(timeline)
+
+    def on_spectrogram_ready(self, file_path, timeline):
+        """后台频谱计算完成，若仍是当前曲目则切换为查表"""
+        if file_path == self.current_file:
+            self.spectrum_processor.set_timeline(timeline)
+
+    def on_player_track_changed(self, file_path):
+        """播放器已无缝切换到预加载的下一首，同步播放状态"""
+        pending, self._gapless_next = self._gapless_next, None
+        self._next_prepared = False
+        if pending and pending[0] == file_path:
+            if pending[2]:
+                # 预加载的是下一首播放队列中的曲目，此时才真正出队
+                self.play_queue.pop()
+        self.on_track_started(file_path)
+
+    def peek_next_track(self):
+        """
+        预判当前曲目结束后要播放的曲目，返回 (路径, 索引, 是否来自队列)，不改变播放状态。
+        文件是否存在只使用后台检查的结果，不在界面线程访问磁盘。
+        """
+        if self.play_mode == "single":
+            if self.current_file:
+                return self.current_file, self.current_index, False
+            return None
+        queued = self.play_queue.peek()
+        if queued and not self.playlist.is_path_missing(queued):
+            return queued, -1, True
+        count = self.playlist.count()
+        if not count:
+            return None
+        if self.play_mode == "random":
+            # 随机顺序中的下一首已经确定，预加载的和最终播放的是同一首
+            index = self.playlist.row_of(self.peek_shuffle_track())
+        else:
+            index = self.next_playable_index((self.current_index + 1) % count, 1)
+        file_path = self.playlist.path_at(index)
+        if not file_path:
+            return None
+        return file_path, index, False
+
+    def prepare_next_track(self):
+        """当前曲目快结束时让播放器预加载下一首，以便无缝衔接（每首只预判一次）"""
+        if not self.player or not self.config.GAPLESS_ENABLED or self._next_prepared:
+            return
+        self._next_prepared = True
+        self._gapless_next = self.peek_next_track()
+        self.player.queue_next(self._gapless_next[0] if self._gapless_next else None)
+
+    def next_playable_index(self, index, step):
+        """从 index 开始按 step 方向找到第一个未被标记为不存在的曲目"""
+        count = self.playlist.count()
+        for _ in range(count):
+            if not self.playlist.is_missing(index):
+                return index
+            index = (index + step) % count
+        return index
+
+    def peek_shuffle_track(self):
+        """随机顺序中的下一首（跳过已知不存在的文件），没有曲目时返回 None；不移动随机顺序的当前位置"""
+        return self.shuffle.peek_next(self.playlist.is_path_missing)
+
+    def advance_shuffle_to(self, file_path):
+        """曲目开始播放后同步随机顺序：正是下一首时前进一步，否则（双击、队列等）记为跳转"""
+        if self.shuffle.current() != file_path:
+            if self.shuffle.peek_next(self.playlist.is_path_missing) == file_path:
+                self.shuffle.next(self.playlist.is_path_missing)
+            else:
+                self.shuffle.jump(file_path)
+        self.save_shuffle_state()
+
+    def restore_shuffle_state(self):
+        """恢复上次的随机播放顺序（属于其他播放列表时重新开始）"""
+        model = self.playlist.model
+        self.shuffle.restore(self.shuffle_store.load(), model.playlist_name, model.paths())
+
+    def save_shuffle_state(self):
+        data = self.shuffle_store.data
+        data.clear()
+        data.update(self.shuffle.to_state())
+        self.shuffle_store.mark_dirty()
+        self.schedule_settings_flush()
+
+    def on_playlist_rows_inserted(self, parent, first, last):
+        for row in range(first, last + 1):
+            self.shuffle.insert(self.playlist.path_at(row))
+        self._next_prepared = False
+
+    def on_playlist_rows_about_to_be_removed(self, parent, first, last):
+        for row in range(first, last + 1):
+            self.shuffle.remove(self.playlist.path_at(row))
+        self._next_prepared = False
+
+    def on_playlist_reset(self):
+        """切换或重新读取播放列表后同步随机顺序"""
+        model = self.playlist.model
+        if model.playlist_name == self.shuffle.playlist_name:
+            self.shuffle.sync(model.paths())
+        else:
+            self.shuffle.reset(model.playlist_name, model.paths(), self.current_file)
+        self.save_shuffle_state()
+        self._next_prepared = False
 
     def add_to_next_play(self, file_path):
-        """添加到下一首播放队列"""
-        if self.playlist_manager:
-            self.playlist_manager.add_to_next_play(file_path)
-            QMessageBox.information(self, "提示", f"已添加到下一首播放队列")
+        """插到播放队列的最前面，当前曲目结束后播放"""
+        self.play_queue.play_next(file_path)
+        self.playlist.check_paths([file_path])
+        self.cancel_prepared_next()
+        QMessageBox.information(self, "提示", f"已添加到下一首播放队列")
+
+    def add_to_play_later(self, file_path):
+        """追加到播放队列的末尾"""
+        self.play_queue.play_later(file_path)
+        self.playlist.check_paths([file_path])
+        self.cancel_prepared_next()
+        QMessageBox.information(self, "提示", f"已添加到播放队列末尾")
+
+    def cancel_prepared_next(self):
+        """播放队列变化后，已预加载的下一首可能不再正确，临近结尾时重新预判"""
+        self._gapless_next = None
+        self._next_prepared = False
+        if self.player:
+            self.player.queue_next(None)
+
+    def save_play_position(self):
+        """保存当前曲目的播放位置"""
+        if self.player and self.current_file:
+            position = self.player.get_position()
+            self.play_queue.set_position(self.current_file, position)
+            self._saved_position = position
 
     def on_playback_finished(self):
         """处理播放结束事件"""
@@ -331,9 +602,8 @@ class PlayerWindow(QMainWindow):
 
     def toggle_play(self):
         # 如果有选中项且不是当前播放曲目，则切换到该曲目并播放
-        selected_items = self.playlist.playlist_widget.selectedItems()
-        if selected_items:
-            file_path = selected_items[0].data(Qt.ItemDataRole.UserRole)
+        file_path = self.playlist.selected_path()
+        if file_path:
             if file_path != self.current_file:
                 self.play_file(file_path)
                 return
@@ -343,6 +613,7 @@ class PlayerWindow(QMainWindow):
         if self.is_playing:
             self.player.pause()
             self.is_playing = False
+            self.save_play_position()
         else:
             self.player.resume()
             self.is_playing = True
@@ -350,67 +621,133 @@ class PlayerWindow(QMainWindow):
 
     def stop(self):
         if self.player:
+            self.save_play_position()
             self.player.stop()
             self.is_playing = False
         self.update_play_pause_icon()
         self.time_label.setText("00:00 / 00:00")
         # 不再直接清空频谱，让spectrum_processor自然处理渐变下降
 
-    def update_spectrum(self):
-        if self.player:
-            # --- 进度条与时间更新 (播放和暂停状态都更新) ---
-            try:
-                pos = self.player.get_position()
-                dur = self.player.get_duration()
-                progress = pos / dur if dur > 0 else 0
-                self.progress_bar.set_progress(progress)
-                
-                # 更新时间显示
-                self.time_label.setText(f"{format_time(pos)} / {format_time(dur)}")
+    def update_progress(self):
+        """进度任务：更新进度环和时间显示，播放和暂停状态都会运行（暂停时降频）"""
+        with self.perf_metrics.measure("position"):
+            if self.player:
+                try:
+                    pos = self.player.get_position()
+                    dur = self.player.get_duration()
+                    progress = pos / dur if dur > 0 else 0
+                    self.progress_bar.set_progress(progress)
+
+                    # 临近结尾时预加载下一首
+                    if dur > 0 and dur - pos <= self.config.GAPLESS_PREPARE_BEFORE_SECONDS:
+                        self.prepare_next_track()
+                    
+                    # 更新时间显示
+                    self.time_label.setText(f"{format_time(pos)} / {format_time(dur)}")
 
-            except Exception:
+                    # 定期保存播放位置，重启后可从这里继续
+                    if self.is_playing and abs(pos - self._saved_position) >= self.config.RESUME_SAVE_INTERVAL_SECONDS:
+                        self.play_queue.set_position(self.current_file, pos)
+                        self._saved_position = pos
+
+                except Exception:
+                    self.progress_bar.set_progress(0)
+                    self.time_label.setText("00:00 / 00:00")
+            else:
+                # 没有播放器时，保持进度条和时间归零
                 self.progress_bar.set_progress(0)
                 self.time_label.setText("00:00 / 00:00")
+        self._sync_perf_counters()
 
-            # --- 频谱更新 (仅在播放时) ---
-            if self.is_playing and not self.performance_mode_enabled:
-                audio_data = self.player.get_audio_data()
-                if audio_data is not None:
-                    data = audio_data[:, 0] if audio_data.ndim > 1 else audio_data
-                    try:
-                        self.audio_queue.put(data, block=False)
-                    except queue.Full:
-                        pass
-                # 从处理器获取处理后的数据
-                try:
-                    display_heights = self.spectrum_processor.get_processed_data_queue().get_nowait()
-                    self.spectrum.update_spectrum(display_heights, self.start_time)
-                except queue.Empty:
-                    pass
-            elif not self.performance_mode_enabled:
-                # 暂停时让频谱自然下降，但不更新进度条
-                try:
-                    display_heights = self.spectrum_processor.get_processed_data_queue().get_nowait()
-                    self.spectrum.update_spectrum(display_heights, self.start_time)
-                except queue.Empty:
-                    pass
-        else:
-            # --- 没有播放器时，保持进度条和时间归零，但让频谱自然下降 ---
-            self.progress_bar.set_progress(0)
-            if not self.performance_mode_enabled:
-                # 仍然尝试从处理器获取渐变下降的频谱数据
-                try:
-                    display_heights = self.spectrum_processor.get_processed_data_queue().get_nowait()
-                    self.spectrum.update_spectrum(display_heights, self.start_time)
-                except queue.Empty:
-                    pass
-            self.time_label.setText("00:00 / 00:00")
+    def update_spectrum(self):
+        """频谱任务：把新的音频数据交给处理线程，并取回一帧显示"""
+        metrics = self.perf_metrics
+        tick_start = time.perf_counter()
+        self._count_dropped_frames(tick_start)
+        if self.player and self.is_playing:
+            with metrics.measure("queue_handoff"):
+                if self.spectrum_processor.has_timeline:
+                    # 有预计算频谱时按播放位置查表
+                    self.player.drain_audio_data()
+                    self.spectrum_processor.feed_position(self.player.get_position())
+                else:
+                    # 取出自上次刷新以来的全部音频块，由处理线程按跳步重新分帧
+                    for audio_data in self.player.drain_audio_data():
+                        # 与离线预计算相同，混合为单声道后再分析
+                        data = audio_data.mean(axis=1) if audio_data.ndim > 1 else audio_data
+                        self.spectrum_processor.feed_audio(data)
+        # 从处理器获取处理后的数据；暂停或停止时让频谱自然下降
+        if not self.pull_spectrum_frame() and not self.is_playing and self.spectrum_processor.idle:
+            # 衰减已经结束，直到播放或窗口状态变化前不再唤醒
+            self.scheduler.suspend("spectrum")
+            self._last_tick_time = None
+        metrics.record("frame", time.perf_counter() - tick_start)
+
+    def pull_spectrum_frame(self):
+        """从处理器取出一帧频谱并更新显示，没有新帧时返回 False"""
+        with self.perf_metrics.measure("processor_wait"):
+            try:
+                display_heights = self.spectrum_processor.get_processed_data_queue().get_nowait()
+            except queue.Empty:
+                return False
+        with self.perf_metrics.measure("set_data"):
+            self.spectrum.update_spectrum(display_heights, self.start_time)
+        return True
+
+    def _count_dropped_frames(self, now):
+        """按频谱任务的实际间隔统计掉帧"""
+        interval = (self.scheduler.interval("spectrum") or self.config.UI_UPDATE_INTERVAL_MS) / 1000.0
+        if self._last_tick_time is not None:
+            gap = now - self._last_tick_time
+            # 超过一秒的间隔来自任务暂停（窗口隐藏等），不算掉帧
+            if interval * 1.5 < gap < 1.0:
+                self.perf_metrics.count("dropped_frames", int(round(gap / interval)) - 1)
+        self._last_tick_time = now
+
+    def _sync_perf_counters(self):
+        """同步各组件自己维护的计数"""
+        metrics = self.perf_metrics
+        metrics.set_counter("audio_queue_overflows", self.spectrum_processor.input_overflows)
+        metrics.set_counter("output_queue_overflows", self.spectrum_processor.output_overflows)
+        if self.player:
+            metrics.set_counter("audio_underruns", self.player.underrun_count)
+        metrics.set_counter("settings_writes", self.settings_store.write_count)
+
+    def mark_settings_dirty(self):
+        """标记设置有未保存的修改，停止修改一段时间后由设置写入任务统一写入"""
+        self.settings_store.mark_dirty()
+        self.schedule_settings_flush()
+
+    def schedule_settings_flush(self):
+        if hasattr(self, "scheduler"):
+            self.scheduler.set_enabled("settings_flush", True)
+            # 连续修改（例如拖动音量）时不断推迟写入，静默期结束后只写一次
+            self.scheduler.restart("settings_flush")
+
+    def flush_settings(self):
+        """设置写入任务：有未保存的修改时交给后台线程写入，然后停止该任务"""
+        self.settings_store.flush_async()
+        self.shuffle_store.flush_async()
+        self.scheduler.set_enabled("settings_flush", False)
+
+    def dump_perf_metrics(self):
+        """把当前性能统计导出为JSON文件，便于离线对比"""
+        path = os.path.join(CONFIG_PATH, f"perf_metrics_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        if self.perf_metrics.dump_json(path):
+            print(f"性能统计已导出: {path}")
 
     def closeEvent(self, event):
         # 关闭窗口前保存设置
-        self.save_settings()
+        self.scheduler.stop_all()
+        self.settings_store.close()
+        self.shuffle_store.close()
         if self.player:
+            self.save_play_position()
             self.player.stop()
+        self.play_queue.close()
+        self.output_engine.close()
+        self.playlist.file_status.shutdown()
+        self.playlist_manager.close()
         if hasattr(self, 'spectrum_processor'):
             self.spectrum_processor.stop()
         event.accept()
@@ -423,7 +760,7 @@ class PlayerWindow(QMainWindow):
     def open_add_music_dialog(self):
         """打开添加音乐对话框"""
         dialog = AddMusicDialog(self, self.bilibili_downloader)
-        dialog.file_added.connect(self.playlist.add_item)
+        dialog.files_added.connect(self.playlist.add_items)
         dialog.exec()
 
     def toggle_play_mode(self):
@@ -433,7 +770,11 @@ class PlayerWindow(QMainWindow):
         self.play_mode_btn.setIcon(self.play_mode_icons[self.current_play_mode_index])
         # 持久化播放模式
         self.settings["play_mode"] = self.play_mode
-        self.save_settings()
+        self.mark_settings_dirty()
+        self._next_prepared = False  # 下一首随模式变化，临近结尾时重新预判
+        if self.play_mode == "random" and self.current_file and self.playlist.row_of(self.current_file) >= 0:
+            # 从当前曲目开始随机播放
+            self.advance_shuffle_to(self.current_file)
 
     def set_play_mode(self, mode):
         """设置播放模式"""
@@ -442,72 +783,59 @@ class PlayerWindow(QMainWindow):
             self.current_play_mode_index = idx
             self.play_mode = mode
             self.play_mode_btn.setIcon(self.play_mode_icons[idx])
+            self._next_prepared = False
         except ValueError:
             print(f"警告: 未知的播放模式 '{mode}'")
 
     def play_next(self):
         """播放下一首"""
-        # 首先检查下一首播放队列
-        if self.playlist_manager:
-            next_file = self.playlist_manager.get_next_from_queue()
-            if next_file and os.path.exists(next_file):
-                self.play_file(next_file)
-                return
+        # 首先检查播放队列
+        next_file = self.play_queue.pop()
+        if next_file and os.path.exists(next_file):
+            self.play_file(next_file)
+            return
         
         # 如果队列为空，按播放模式播放
-        if not self.playlist.playlist_widget.count():
+        count = self.playlist.count()
+        if not count:
             return
             
         if self.play_mode == "random":
-            # 随机播放模式
-            import random
-            count = self.playlist.playlist_widget.count()
-            if count > 1:
-                # 确保不会连续播放同一首歌
-                next_index = self.current_index
-                while next_index == self.current_index:
-                    next_index = random.randint(0, count - 1)
-                self.current_index = next_index
-            else:
-                self.current_index = 0
+            # 随机播放模式，按随机顺序播放下一首（与预加载的是同一首）
+            self.current_index = self.playlist.row_of(self.peek_shuffle_track())
         else:
-            # 顺序播放模式和单曲循环模式都切换到下一首
-            self.current_index = (self.current_index + 1) % self.playlist.playlist_widget.count()
+            # 顺序播放模式和单曲循环模式都切换到下一首（跳过已知不存在的文件）
+            self.current_index = self.next_playable_index((self.current_index + 1) % count, 1)
             
         # 获取并播放下一首
-        item = self.playlist.playlist_widget.item(self.current_index)
-        if item:
-            file_path = item.data(Qt.ItemDataRole.UserRole)
+        file_path = self.playlist.path_at(self.current_index)
+        if file_path:
             self.play_file(file_path)
-            self.playlist.playlist_widget.setCurrentRow(self.current_index)
+            self.playlist.set_current_row(self.current_index)
 
     def play_previous(self):
         """播放上一首"""
-        if not self.playlist.playlist_widget.count():
+        count = self.playlist.count()
+        if not count:
             return
             
         if self.play_mode == "random":
-            # 随机播放模式
-            import random
-            count = self.playlist.playlist_widget.count()
-            if count > 1:
-                # 确保不会连续播放同一首歌
-                prev_index = self.current_index
-                while prev_index == self.current_index:
-                    prev_index = random.randint(0, count - 1)
-                self.current_index = prev_index
-            else:
-                self.current_index = 0
+            # 随机播放模式，回到实际播放过的上一首（跳过已知不存在的文件）
+            file_path = self.shuffle.previous()
+            while file_path is not None and self.playlist.is_missing(self.playlist.row_of(file_path)):
+                file_path = self.shuffle.previous()
+            if file_path is None:
+                return
+            self.current_index = self.playlist.row_of(file_path)
         else:
-            # 顺序播放模式和单曲循环模式都切换到上一首
-            self.current_index = (self.current_index - 1) % self.playlist.playlist_widget.count()
+            # 顺序播放模式和单曲循环模式都切换到上一首（跳过已知不存在的文件）
+            self.current_index = self.next_playable_index((self.current_index - 1) % count, -1)
             
         # 获取并播放上一首
-        item = self.playlist.playlist_widget.item(self.current_index)
-        if item:
-            file_path = item.data(Qt.ItemDataRole.UserRole)
+        file_path = self.playlist.path_at(self.current_index)
+        if file_path:
             self.play_file(file_path)
-            self.playlist.playlist_widget.setCurrentRow(self.current_index)
+            self.playlist.set_current_row(self.current_index)
 
     def seek_playback(self, progress):
         """处理跳转请求"""
@@ -525,13 +853,50 @@ class PlayerWindow(QMainWindow):
             self.is_playing = True # 确保状态正确
             self.update_play_pause_icon()
 
-    def toggle_performance_mode(self, checked):
-        """切换性能模式"""
-        self.performance_mode_enabled = checked
-        self.spectrum.setVisible(not checked)
+    def set_performance_profile(self, name, save=True):
+        """切换性能档位，无需重新开始播放"""
+        profiles = self.config.PERFORMANCE_PROFILES
+        if name not in profiles:
+            name = self.config.DEFAULT_PERFORMANCE_PROFILE
+        profile = profiles[name]
+        self.performance_profile = name
+        self.playlist.set_performance_profile(name)
+
+        ui_interval = profile["ui_interval_ms"]
+        self.scheduler.set_policy("spectrum", playing=ui_interval, paused=ui_interval)
+        self.scheduler.set_policy("progress", playing=ui_interval)
+        self.scheduler.set_enabled("background", profile["background_animation"])
+
+        self.spectrum_processor.set_hop_size(profile["stft_hop"])
+        self.spectrum_processor.set_output_bars(profile["num_bars"])
+        self.spectrum.set_num_bars(profile["num_bars"])
+
+        was_enabled = self.analysis_enabled
+        self.analysis_enabled = profile["analysis"]
+        if self.player:
+            self.player.set_capture_enabled(self.analysis_enabled)
+        self.spectrum.setVisible(self.analysis_enabled)
+        self.scheduler.set_enabled("spectrum", self.analysis_enabled)
+        if self.analysis_enabled:
+            self.spectrum_processor.start()
+            if not was_enabled and self.current_file:
+                self.load_spectrogram(self.current_file)
+        else:
+            # 关闭时停止处理线程，整个分析流程不再占用CPU
+            self.spectrum_processor.stop()
+            self.spectrum_processor.set_timeline(None)
+            if self.spectrogram_cache:
+                self.spectrogram_cache.retain([])
+
+        if save:
+            self.settings["performance_profile"] = name
+            self.mark_settings_dirty()
 
     def eventFilter(self, source, event):
-        """事件过滤器，用于处理音量条的显示和隐藏"""
+        """事件过滤器，用于处理音量条的显示和隐藏，以及窗口曝光状态的变化"""
+        if source is self.windowHandle() and event.type() == QEvent.Type.Expose:
+            self.refresh_window_state()
+            return False
         if source == self.volume_container:
             if event.type() == event.Type.Enter:
                 self.volume_slider.setVisible(True)
@@ -551,32 +916,21 @@ class PlayerWindow(QMainWindow):
         # 更新并保存设置（确保设置已初始化）
         if hasattr(self, "settings"):
             self.settings["volume"] = value
-            self.save_settings()
+            self.mark_settings_dirty()
 
     def load_settings_data(self):
         """仅加载设置数据，不应用到UI控件"""
-        try:
-            if os.path.exists(self.config.SETTINGS_FILE):
-                with open(self.config.SETTINGS_FILE, 'r') as f:
-                    self.settings = json.load(f)
-            else:
-                # 如果文件不存在，使用默认值
-                self.settings = {
-                    "volume": 100, 
-                    "play_mode": "sequence", 
-                    "last_played_file": "",
-                    "download_path": Config.DEFAULT_DOWNLOAD_PATH,
-                    "proxy": ""
-                }
-        except (json.JSONDecodeError, FileNotFoundError):
-            # 如果文件损坏或无法读取，使用默认值
-            self.settings = {
-                "volume": 100, 
-                "play_mode": "sequence", 
-                "last_played_file": "",
-                "download_path": Config.DEFAULT_DOWNLOAD_PATH,
-                "proxy": ""
-            }
+        self.settings_store = SettingsStore(self.config.SETTINGS_FILE, {
+            "volume": 100, 
+            "play_mode": "sequence", 
+            "last_played_file": "",
+            "download_path": Config.DEFAULT_DOWNLOAD_PATH,
+            "proxy": "",
+            "pcm_cache_enabled": Config.PCM_CACHE_ENABLED,
+            "performance_profile": Config.DEFAULT_PERFORMANCE_PROFILE
+        })
+        # self.settings 与存储共用同一个字典，修改后调用 mark_settings_dirty()
+        self.settings = self.settings_store.load()
 
         # 确保下载目录存在
         download_path = self.settings.get("download_path", Config.DEFAULT_DOWNLOAD_PATH)
@@ -596,14 +950,15 @@ class PlayerWindow(QMainWindow):
             self.volume_slider.setValue(self.settings.get("volume", 100))
         # 恢复播放模式
         self.set_play_mode(self.settings.get("play_mode", "sequence"))
+        # 恢复性能档位
+        self.set_performance_profile(
+            self.settings.get("performance_profile", Config.DEFAULT_PERFORMANCE_PROFILE), save=False
+        )
 
     def save_settings(self):
-        """保存播放器设置"""
-        try:
-            with open(self.config.SETTINGS_FILE, 'w') as f:
-                json.dump(self.settings, f, indent=4)
-        except IOError as e:
-            print(f"无法保存设置: {e}")
+        """立即保存播放器设置（在后台线程写入）"""
+        self.settings_store.mark_dirty()
+        self.settings_store.flush_async()
 
     def restore_last_played_track(self):
         """在播放列表中定位并选中上一次播放的曲目"""
@@ -612,12 +967,10 @@ class PlayerWindow(QMainWindow):
             return
 
         # 查找文件在当前播放列表中的位置
-        for i in range(self.playlist.playlist_widget.count()):
-            item = self.playlist.playlist_widget.item(i)
-            if item and item.data(Qt.ItemDataRole.UserRole) == last_file:
-                self.current_index = i
-                self.playlist.playlist_widget.setCurrentRow(i)
-                break
+        row = self.playlist.row_of(last_file)
+        if row >= 0:
+            self.current_index = row
+            self.playlist.set_current_row(row)
 
     def on_playlist_selection_changed(self):
         """处理播放列表选择变化"""
@@ -626,9 +979,8 @@ class PlayerWindow(QMainWindow):
     def update_play_pause_icon(self):
         """根据播放状态和选中歌曲更新播放/暂停按钮的图标"""
         # 获取当前选中的歌曲
-        selected_items = self.playlist.playlist_widget.selectedItems()
-        if selected_items:
-            selected_file = selected_items[0].data(Qt.ItemDataRole.UserRole)
+        selected_file = self.playlist.selected_path()
+        if selected_file:
             # 如果正在播放且选中的是当前播放的歌曲，显示暂停图标
             if self.is_playing and selected_file == self.current_file:
                 self.play_pause_btn.setIcon(create_icon(get_icon_path("pause.svg")))
@@ -650,6 +1002,7 @@ class PlayerWindow(QMainWindow):
             new_settings = dialog.get_settings()
             self.settings.update(new_settings)
             self.save_settings()
+            self.update_pcm_cache()
             
             # 确保下载目录存在
             download_path = self.settings.get("download_path", Config.DEFAULT_DOWNLOAD_PATH)
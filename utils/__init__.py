@@ -5,18 +5,24 @@ from .config import Config, ASSETS_PATH, CONFIG_PATH
 from .playlist_manager import PlaylistManager
 from .ui_components import (
     EventLoggingWidget, SpectrumWidget, GradientWidget, 
-    CircularProgressBar, VolumeSlider, PlayPauseIcon
+    CircularProgressBar, VolumeSlider, PlayPauseIcon, PerfOverlay
 )
 from .dialogs import AddMusicDialog, PlaylistManagerDialog, SettingsDialog
 from .playlist_widget import CollapsiblePlaylist
+from .perf_metrics import PerfMetrics
+from .scheduler import TaskScheduler
+from .settings_store import SettingsStore
+from .shuffle_engine import ShuffleEngine
+from .play_queue import PlayQueue
 from .helpers import create_icon, format_time, ensure_directory_exists, get_icon_path
 
 __all__ = [
     'Config', 'ASSETS_PATH', 'CONFIG_PATH',
     'PlaylistManager',
     'EventLoggingWidget', 'SpectrumWidget', 'GradientWidget', 
-    'CircularProgressBar', 'VolumeSlider', 'PlayPauseIcon',
+    'CircularProgressBar', 'VolumeSlider', 'PlayPauseIcon', 'PerfOverlay',
     'AddMusicDialog', 'PlaylistManagerDialog', 'SettingsDialog',
     'CollapsiblePlaylist',
+    'PerfMetrics', 'TaskScheduler', 'SettingsStore', 'ShuffleEngine', 'PlayQueue',
     'create_icon', 'format_time', 'ensure_directory_exists', 'get_icon_path'
 ] 
\ No newline at end of file
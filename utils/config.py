@@ -25,6 +25,15 @@ class Config:
     MAX_FREQ = 8000
     NUM_BARS = 100
     MAX_DB_VALUE = 90.0
+    # 频段内FFT幅度的归约方式: "max"（峰值）或 "mean"（平均）
+    SPECTRUM_BAND_REDUCTION = "max"
+    # 频谱分析的窗口大小和跳步（样本数），与音频块大小 CHUNK_SIZE 相互独立
+    FFT_WINDOW_SIZE = 2048
+    FFT_HOP_SIZE = 512
+    # 频谱分析线程的最高输出帧率（两帧之间到达的音频合并分析），也是停止输入后衰减动画的帧率
+    SPECTRUM_FRAME_RATE = 40
+    # 衰减到该高度以下时归零，处理线程随后进入空闲等待
+    SPECTRUM_DECAY_FLOOR = 0.5
     
     # --- 频谱和进度条尺寸 ---
     # 下面的半径值与 setup_ui 中固定的容器尺寸相关联
@@ -40,6 +49,76 @@ class Config:
     WINDOW_TITLE = "Bili音乐播放助手"
     WINDOW_SIZE = (900, 600)
     UI_UPDATE_INTERVAL_MS = 25
+    # 暂停时进度环的刷新间隔（4 Hz），以及窗口最小化或被遮挡时播放中的进度检查间隔
+    PROGRESS_PAUSED_INTERVAL_MS = 250
+    PROGRESS_HIDDEN_INTERVAL_MS = 1000
+    # 设置修改后延迟写入磁盘的时间
+    SETTINGS_FLUSH_DELAY_MS = 2000
+    # 性能统计：每个阶段保留的样本数，覆盖层和导出JSON的快捷键
+    PERF_METRICS_WINDOW = 600
+    PERF_OVERLAY_SHORTCUT = "F3"
+    PERF_DUMP_SHORTCUT = "Ctrl+F3"
+
+    # --- 性能档位 ---
+    # num_bars: 显示的频谱条数；stft_hop: STFT跳步（样本数，越大每秒分析越少）；
+    # ui_interval_ms: 界面刷新间隔；background_animation: 背景渐变是否动画；
+    # analysis: 是否运行频谱分析（关闭时整个分析流程不占用CPU）
+    PERFORMANCE_PROFILES = {
+        "full": {"label": "完整", "num_bars": 100, "stft_hop": 512, "ui_interval_ms": 25,
+                 "background_animation": True, "analysis": True},
+        "reduced": {"label": "均衡", "num_bars": 50, "stft_hop": 1024, "ui_interval_ms": 33,
+                    "background_animation": True, "analysis": True},
+        "minimal": {"label": "节能", "num_bars": 25, "stft_hop": 2048, "ui_interval_ms": 50,
+                    "background_animation": False, "analysis": True},
+        "off": {"label": "关闭频谱", "num_bars": 25, "stft_hop": 2048, "ui_interval_ms": 250,
+                "background_animation": False, "analysis": False},
+    }
+    DEFAULT_PERFORMANCE_PROFILE = "full"
+
+    # --- 背景动画 ---
+    # 背景相位的推进帧率和速度（弧度/秒）。
+    # 背景颜色每变化一次，叠在上面的半透明子部件（包括播放列表）都要跟着重绘，
+    # 因此每秒最多推进一次；色相变化很慢，逐秒变化看不出跳变
+    BACKGROUND_FPS = 1
+    BACKGROUND_PHASE_SPEED = 0.1
+    # 色相量化级数，量化后的颜色不变时不重绘
+    BACKGROUND_HUE_STEPS = 256
+    # 渐变缓存像素图相对窗口的缩放比例
+    BACKGROUND_CACHE_SCALE = 0.25
+
+    # --- 音频输出 ---
+    # 输出流采样率，None 表示使用设备默认采样率（采样率不同的曲目会被重采样）
+    OUTPUT_SAMPLE_RATE = None
+    OUTPUT_CHANNELS = 2
+
+    # --- 音频缓冲 ---
+    # 解码线程最多领先播放的秒数（环形缓冲区容量）
+    AUDIO_READ_AHEAD_SECONDS = 2.0
+    # 打开输出流前预先缓冲的秒数
+    AUDIO_PREFILL_SECONDS = 0.25
+
+    # --- 无缝播放 ---
+    GAPLESS_ENABLED = True
+    # 当前曲目剩余多少秒时开始准备下一首
+    GAPLESS_PREPARE_BEFORE_SECONDS = 10.0
+    # 下一首预先解码的秒数（流式解码时受 AUDIO_READ_AHEAD_SECONDS 限制）
+    GAPLESS_PRELOAD_SECONDS = 2.0
+
+    # --- 元数据缓存 ---
+    # ffprobe结果（采样率、声道、时长、编码）的持久化缓存，按文件大小和修改时间失效
+    PROBE_CACHE_FILE = os.path.join(CONFIG_PATH, "probe_cache.json")
+
+    # --- 预计算频谱 ---
+    # 播放时在后台把整首曲目的频谱算好并缓存，之后按播放位置查表，画面更稳定且不占实时CPU
+    SPECTROGRAM_CACHE_ENABLED = True
+    SPECTROGRAM_CACHE_DIR = os.path.join(CONFIG_PATH, "spectrogram_cache")
+
+    # --- 解码缓存 ---
+    # 启用后曲目只解码一次并写入内存映射缓存，跳转只需移动读取偏移
+    PCM_CACHE_ENABLED = False
+    PCM_CACHE_DIR = os.path.join(CONFIG_PATH, "pcm_cache")
+    # 缓存目录的容量上限，超出后按最近使用时间淘汰
+    PCM_CACHE_MAX_MB = 1024
     COLOR_POSITIONS = [0.0, 0.2, 0.4, 0.8]
     COLOR_MAP_COLORS = [
         (40, 0, 60, 180),
@@ -47,8 +126,23 @@ class Config:
         (255, 0, 150, 255),
         (255, 180, 255, 255),
     ]
+    # 频谱颜色查找表的量化级数，画笔按级数预先创建一次。
+    # 绘制时同一级的频谱条合并为一次 drawPath，级数过多时几乎每条一级，合并就失去了作用
+    COLOR_LUT_LEVELS = 24
+    # 播放列表中文件存在性检查结果的有效期（秒）
+    FILE_STATUS_TTL_SECONDS = 30.0
+    # 播放列表搜索框停止输入多久后才执行搜索（毫秒）
+    SEARCH_DEBOUNCE_MS = 150
+    # 播放列表日志累积多少条修改后合并为新的快照
+    PLAYLIST_JOURNAL_COMPACT_OPS = 1000
     PLAYLIST_FILE = os.path.join(CONFIG_PATH, "playlist.json")
     SETTINGS_FILE = os.path.join(CONFIG_PATH, "settings.json")
+    # 随机播放顺序的保存位置，以及上一轮保留的可回退曲目数
+    SHUFFLE_STATE_FILE = os.path.join(CONFIG_PATH, "shuffle_state.json")
+    SHUFFLE_HISTORY_LIMIT = 200
+    # 保留的播放历史条数，以及播放中保存当前位置的间隔（秒）
+    PLAY_HISTORY_LIMIT = 100
+    RESUME_SAVE_INTERVAL_SECONDS = 5.0
     
     # --- 项目信息 ---
     GITHUB_URL = "https://github.com/Ovalene2333/bili_spectrum_player"  # 请替换
@@ -1,14 +1,14 @@
 import os
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QListWidget,
-    QFormLayout, QFileDialog, QMessageBox, QInputDialog
+    QFormLayout, QFileDialog, QMessageBox, QInputDialog, QCheckBox
 )
 from PyQt6.QtCore import pyqtSignal
 from .config import Config
 
 
 class AddMusicDialog(QDialog):
-    file_added = pyqtSignal(str)
+    files_added = pyqtSignal(list)  # 一次添加的一组文件路径
     
     def __init__(self, parent=None, bilibili_downloader=None):
         super().__init__(parent)
@@ -51,7 +51,7 @@ class AddMusicDialog(QDialog):
             if url:
                 try:
                     output_path = self.bilibili_downloader.download_from_url(url)
-                    self.file_added.emit(output_path)
+                    self.files_added.emit([output_path])
                     self.bilibili_input.clear()
                     QMessageBox.information(self, "成功", "音频下载完成！")
                 except Exception as e:
@@ -61,8 +61,9 @@ class AddMusicDialog(QDialog):
         files, _ = QFileDialog.getOpenFileNames(
             self, "选择音频文件", "", "音频文件 (*.mp3 *.wav *.ogg *.flac *.aac *.m4a)"
         )
-        for file in files:
-            self.file_added.emit(file)
+        if files:
+            # 一次选中的所有文件作为一批添加
+            self.files_added.emit(files)
 
 
 class PlaylistManagerDialog(QDialog):
@@ -146,6 +147,10 @@ class SettingsDialog(QDialog):
         # 代理设置
         self.proxy_edit = QLineEdit()
         form_layout.addRow("代理:", self.proxy_edit)
+
+        # 解码缓存
+        self.pcm_cache_check = QCheckBox("缓存解码后的音频（跳转更快，占用磁盘空间）")
+        form_layout.addRow("解码缓存:", self.pcm_cache_check)
         
         layout.addLayout(form_layout)
         
@@ -168,10 +173,12 @@ class SettingsDialog(QDialog):
     def load_settings(self):
         self.download_path_edit.setText(self.settings.get("download_path", ""))
         self.proxy_edit.setText(self.settings.get("proxy", ""))
+        self.pcm_cache_check.setChecked(self.settings.get("pcm_cache_enabled", Config.PCM_CACHE_ENABLED))
     
     def accept_settings(self):
         self.settings["download_path"] = self.download_path_edit.text()
         self.settings["proxy"] = self.proxy_edit.text()
+        self.settings["pcm_cache_enabled"] = self.pcm_cache_check.isChecked()
         self.accept()
     
     def get_settings(self):
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class FileStatus:
+    """一个文件的检查结果"""
+
+    __slots__ = ("exists", "size", "mtime", "checked_at")
+
+    def __init__(self, exists, size=0, mtime=0.0, checked_at=0.0):
+        self.exists = exists
+        self.size = size
+        self.mtime = mtime
+        self.checked_at = checked_at
+
+
+class FileStatusChecker(QObject):
+    """
+    在线程池中分批检查文件是否存在（以及大小、修改时间），结果带有效期缓存。
+    检查不阻塞界面线程，每完成一批通过 status_ready 信号把结果送回界面线程。
+    """
+
+    status_ready = pyqtSignal(list)  # 一批检查结果 [路径, ...]，状态通过 get() 读取
+
+    def __init__(self, ttl_seconds=30.0, batch_size=256, max_workers=4, parent=None):
+        super().__init__(parent)
+        self.ttl_seconds = ttl_seconds
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="file-status")
+        self._cache = {}  # {路径: FileStatus}
+        self._pending = set()  # 已提交、尚未完成检查的路径
+        self._lock = threading.Lock()
+        self._generation = 0  # 每次 cancel_pending() 后递增，旧批次不再执行
+        self.checks = 0  # 实际执行 stat 的次数
+        self.cache_hits = 0
+
+    def get(self, path):
+        """读取缓存的检查结果（可能已过期），从未检查过时返回 None"""
+        return self._cache.get(path)
+
+    def is_missing(self, path):
+        """已知文件不存在时返回 True（尚未检查时视为存在）"""
+        status = self._cache.get(path)
+        return status is not None and not status.exists
+
+    def request(self, paths):
+        """请求检查一组路径：有效期内已有结果的跳过，其余分批提交到线程池"""
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            for path in paths:
+                status = self._cache.get(path)
+                if status is not None and now - status.checked_at < self.ttl_seconds:
+                    self.cache_hits += 1
+                    continue
+                if path in self._pending:
+                    continue
+                self._pending.add(path)
+                stale.append(path)
+            generation = self._generation
+        for start in range(0, len(stale), self.batch_size):
+            batch = stale[start:start + self.batch_size]
+            self._executor.submit(self._check_batch, batch, generation)
+
+    def invalidate(self, path):
+        """使某个路径的缓存失效（例如文件被删除后）"""
+        with self._lock:
+            self._cache.pop(path, None)
+
+    def cancel_pending(self):
+        """放弃尚未开始的批次（例如切换播放列表时）"""
+        with self._lock:
+            self._generation += 1
+            self._pending.clear()
+
+    def shutdown(self):
+        self.cancel_pending()
+        self._executor.shutdown(wait=False)
+
+    def _check_batch(self, paths, generation):
+        if generation != self._generation:
+            return
+        results = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                status = FileStatus(True, st.st_size, st.st_mtime, time.monotonic())
+            except OSError:
+                status = FileStatus(False, checked_at=time.monotonic())
+            results.append((path, status))
+        with self._lock:
+            self.checks += len(results)
+            for path, status in results:
+                self._cache[path] = status
+                self._pending.discard(path)
+        self.status_ready.emit([path for path, _ in results])
+
+    def get_stats(self):
+        """获取检查次数与缓存命中统计"""
+        return {
+            "checks": self.checks,
+            "cache_hits": self.cache_hits,
+            "cached": len(self._cache),
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,109 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+
+class PerfMetrics:
+    """
+    界面刷新循环的性能统计：各阶段耗时的滚动百分位数（p50/p95/p99）以及各类计数器。
+    可同时被界面线程和处理线程写入，结果可显示在覆盖层上或导出为JSON离线对比。
+    """
+
+    def __init__(self, window=600):
+        self.window = window  # 每个阶段保留的最近样本数
+        self._stages = {}  # {阶段名: deque(耗时秒数)}
+        self._counters = {}  # {计数器名: 次数}
+        self._lock = threading.Lock()
+        self._created = time.time()
+
+    def record(self, stage, seconds):
+        """记录某个阶段的一次耗时（秒）"""
+        with self._lock:
+            samples = self._stages.get(stage)
+            if samples is None:
+                samples = self._stages[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    @contextmanager
+    def measure(self, stage):
+        """以 with 语句计时一个阶段"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def count(self, counter, n=1):
+        """累加计数器"""
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def set_counter(self, counter, value):
+        """直接设置计数器（用于同步其他组件自己维护的计数）"""
+        with self._lock:
+            self._counters[counter] = value
+
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self._created = time.time()
+
+    def stage_stats(self, stage):
+        """获取一个阶段的统计（毫秒），没有样本时返回 None"""
+        with self._lock:
+            samples = self._stages.get(stage)
+            values = np.array(samples) if samples else None
+        if values is None:
+            return None
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+        return {
+            "count": len(values),
+            "mean_ms": float(values.mean() * 1000),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(values.max() * 1000),
+        }
+
+    def snapshot(self):
+        """获取全部统计的快照"""
+        with self._lock:
+            stages = list(self._stages)
+            counters = dict(self._counters)
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": time.time() - self._created,
+            "stages": {stage: self.stage_stats(stage) for stage in stages},
+            "counters": counters,
+        }
+
+    def format_text(self):
+        """格式化为覆盖层显示的多行文本"""
+        snapshot = self.snapshot()
+        lines = [f"{'阶段':<16}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for stage, stats in snapshot["stages"].items():
+            if stats:
+                lines.append(f"{stage:<16}{stats['p50_ms']:>8.2f}{stats['p95_ms']:>8.2f}{stats['p99_ms']:>8.2f}")
+        for counter, value in sorted(snapshot["counters"].items()):
+            lines.append(f"{counter:<24}{value:>8}")
+        return "\n".join(lines)
+
+    def dump_json(self, path):
+        """把快照写入JSON文件，返回是否成功"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            return True
+        except OSError as e:
+            print(f"导出性能统计失败: {e}", file=sys.stderr)
+            return False
@@ -0,0 +1,200 @@
+from collections import deque
+from .playlist_journal import PlaylistJournal
+
+
+class PlayQueue:
+    """
+    播放队列。队列中的每个条目有一个整数ID，两端的入队和出队都是常数时间；
+    按ID移除只做标记（出队时跳过），按ID调整位置时才整理一次。
+    同时记录有限条数的播放历史，以及当前曲目和播放位置，重启后可从原处继续。
+    所有修改作为日志增量写入（见 PlaylistJournal），日志过长时合并为快照。
+    """
+
+    def __init__(self, directory, history_limit=100, compact_threshold=1000):
+        self.journal = PlaylistJournal(directory, compact_threshold, name="play_queue")
+        self._entries = deque()  # 条目ID，其中可能有已移除的条目
+        self._paths = {}  # 有效条目：ID → 路径
+        self._ids = {}  # 路径 → 条目ID，用于去重
+        self._next_id = 1
+        self.history = deque(maxlen=history_limit)  # 最近播放的曲目，最新的在最后
+        self.resume_path = None  # 当前曲目
+        self.resume_position = 0.0  # 当前曲目的播放位置（秒）
+        self._replaying = False
+        self.load()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, path):
+        return path in self._ids
+
+    # --- 入队与出队 ---
+    def play_next(self, path):
+        """插到队首（已在队列中时移到队首），返回条目ID"""
+        return self._push(path, front=True)
+
+    def play_later(self, path):
+        """追加到队尾（已在队列中时保持原位），返回条目ID"""
+        entry_id = self._ids.get(path)
+        if entry_id is not None:
+            return entry_id
+        return self._push(path, front=False)
+
+    def peek(self):
+        """查看队首的曲目但不取出，队列为空时返回 None"""
+        self._drop_removed()
+        return self._paths[self._entries[0]] if self._entries else None
+
+    def pop(self):
+        """取出队首的曲目，队列为空时返回 None"""
+        self._drop_removed()
+        if not self._entries:
+            return None
+        entry_id = self._entries.popleft()
+        path = self._forget(entry_id)
+        self._record("pop", id=entry_id)
+        return path
+
+    def remove(self, entry_id):
+        """按ID移除条目"""
+        if entry_id not in self._paths:
+            return False
+        self._forget(entry_id)
+        self._record("remove", id=entry_id)
+        return True
+
+    def move(self, entry_id, index):
+        """把条目移到队列中的第 index 个位置"""
+        if entry_id not in self._paths:
+            return False
+        entries = [other for other in self._entries if other in self._paths and other != entry_id]
+        index = max(0, min(index, len(entries)))
+        entries.insert(index, entry_id)
+        self._entries = deque(entries)
+        self._record("move", id=entry_id, index=index)
+        return True
+
+    def clear(self):
+        if self._paths:
+            self._entries.clear()
+            self._paths.clear()
+            self._ids.clear()
+            self._record("clear")
+
+    def entries(self):
+        """队列中的全部条目 [(ID, 路径), ...]"""
+        return [(entry_id, self._paths[entry_id]) for entry_id in self._entries if entry_id in self._paths]
+
+    # --- 历史与播放位置 ---
+    def record_played(self, path):
+        """记录开始播放的曲目，同时把它设为当前曲目（位置归零）"""
+        self.history.append(path)
+        self.resume_path = path
+        self.resume_position = 0.0
+        self._record("played", path=path)
+
+    def set_position(self, path, position):
+        """记录当前曲目的播放位置"""
+        self.resume_path = path
+        self.resume_position = float(position)
+        self._record("position", path=path, position=self.resume_position)
+
+    # --- 持久化 ---
+    def load(self):
+        """读取快照并重放之后的日志"""
+        try:
+            snapshot, ops = self.journal.load()
+        except (OSError, ValueError) as e:
+            print(f"读取播放队列失败: {e}")
+            snapshot, ops = None, []
+            self.journal.needs_compact = True
+        self._replaying = True
+        if isinstance(snapshot, dict):
+            try:
+                for entry_id, path in snapshot.get("queue", []):
+                    self._push(path, False, int(entry_id))
+                self._next_id = max(self._next_id, int(snapshot.get("next_id", 1)))
+                self.history.extend(path for path in snapshot.get("history", []) if isinstance(path, str))
+                resume = snapshot.get("resume") or {}
+                self.resume_path = resume.get("path")
+                self.resume_position = float(resume.get("position", 0.0))
+            except (AttributeError, TypeError, ValueError):
+                print("警告: 播放队列数据格式错误，已部分忽略")
+        try:
+            for op in ops:
+                try:
+                    self._apply_op(op)
+                except (KeyError, TypeError, ValueError, AttributeError):
+                    print(f"警告: 忽略无效的播放队列日志记录 {op}")
+        finally:
+            self._replaying = False
+        if (ops or self.journal.needs_compact) and not self.journal.snapshot_failed:
+            self.save()
+
+    def save(self):
+        """把完整状态写入快照并清空日志"""
+        return self.journal.compact({
+            "queue": [[entry_id, path] for entry_id, path in self.entries()],
+            "next_id": self._next_id,
+            "history": list(self.history),
+            "resume": {"path": self.resume_path, "position": self.resume_position},
+        })
+
+    def close(self):
+        if self.journal.pending_ops:
+            self.save()
+        self.journal.close()
+
+    def _apply_op(self, op):
+        kind = op.get("op")
+        if kind == "push":
+            self._push(op["path"], op["front"], int(op["id"]))
+        elif kind in ("pop", "remove"):
+            self._forget(int(op["id"]))
+        elif kind == "move":
+            self.move(int(op["id"]), int(op["index"]))
+        elif kind == "clear":
+            self.clear()
+        elif kind == "played":
+            self.record_played(op["path"])
+        elif kind == "position":
+            self.set_position(op["path"], op["position"])
+
+    def _record(self, op, **fields):
+        if self._replaying:
+            return
+        fields["op"] = op
+        if self.journal.append(fields):
+            self.save()
+
+    # --- 内部实现 ---
+    def _push(self, path, front, entry_id=None):
+        old_id = self._ids.get(path)
+        if old_id is not None:
+            self._forget(old_id)
+        if entry_id is None:
+            entry_id = self._next_id
+        self._next_id = max(self._next_id, entry_id + 1)
+        if front:
+            self._entries.appendleft(entry_id)
+        else:
+            self._entries.append(entry_id)
+        self._paths[entry_id] = path
+        self._ids[path] = entry_id
+        self._record("push", id=entry_id, path=path, front=front)
+        return entry_id
+
+    def _forget(self, entry_id):
+        """把条目标记为已移除（留在 deque 中，出队时跳过）"""
+        path = self._paths.pop(entry_id, None)
+        if path is not None and self._ids.get(path) == entry_id:
+            del self._ids[path]
+        return path
+
+    def _drop_removed(self):
+        entries = self._entries
+        while entries and entries[0] not in self._paths:
+            entries.popleft()
+        # 已移除的条目过多时整理一次，避免 deque 无限增长
+        if len(entries) > 2 * len(self._paths) + 32:
+            self._entries = deque(entry_id for entry_id in entries if entry_id in self._paths)
@@ -0,0 +1,185 @@
+import json
+import os
+import sys
+import time
+
+
+class PlaylistJournal:
+    """
+    播放列表的增量存储：playlists.json 为快照（沿用原有格式，旧数据无需转换），
+    之后的每次修改作为一行 JSON 追加到 playlists.journal，单次修改的写入量与曲库大小无关。
+    加载时先读快照再按顺序重放日志；日志累积到一定条数后合并进新的快照（压缩）。
+    每条操作带递增序号，快照记录已包含的最大序号，压缩中途崩溃时不会重复重放。
+    name 为文件名前缀，播放队列也使用同样的存储（play_queue.json / play_queue.journal）。
+    """
+
+    def __init__(self, directory, compact_threshold=1000, name="playlists"):
+        self.snapshot_path = os.path.join(directory, f"{name}.json")
+        self.journal_path = os.path.join(directory, f"{name}.journal")
+        self.compact_threshold = compact_threshold
+        self._file = None
+        self.seq = 0  # 最近一条操作的序号
+        self.pending_ops = 0  # 快照之后日志中的操作条数
+        self.needs_compact = False  # 日志末尾损坏或含有已合并的记录，应尽快压缩
+        self.snapshot_failed = False  # 快照无法读取（已另存为 .bak），加载后不应立即压缩
+        self.appends = 0  # 追加写入日志的次数
+        self.compactions = 0  # 写入快照的次数
+
+    def load(self):
+        """读取快照和日志，返回 (快照数据或 None, [操作, ...])"""
+        snapshot = self._load_snapshot()
+        snapshot_seq = snapshot.get("journal_seq", 0) if snapshot is not None else 0
+        self.seq = snapshot_seq
+        self.needs_compact = False
+        ops = []
+        if os.path.exists(self.journal_path):
+            try:
+                ops = self._read_journal(snapshot_seq)
+            except OSError as e:
+                print(f"读取播放列表日志失败: {e}", file=sys.stderr)
+        self.pending_ops = len(ops)
+        return snapshot, ops
+
+    def _read_journal(self, snapshot_seq):
+        """
+        读取快照之后的操作。遇到写到一半被中断的行时，把日志截断到最后一条完整记录的末尾：
+        之后追加的记录才不会接在损坏的行后面、在下次加载时被一起丢弃。
+        """
+        ops = []
+        good_end = 0  # 最后一条完整记录之后的字节偏移
+        torn = False
+        with open(self.journal_path, 'rb') as f:
+            for raw in f:
+                line = raw.strip()
+                if line:
+                    try:
+                        op = json.loads(line.decode('utf-8'))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        # 之后的内容不可信
+                        torn = True
+                        break
+                    seq = op.get("seq", 0) if isinstance(op, dict) else 0
+                    if seq > snapshot_seq:
+                        ops.append(op)
+                        self.seq = max(self.seq, seq)
+                    else:
+                        self.needs_compact = True
+                good_end += len(raw)
+                last_complete = raw.endswith(b"\n")
+        if torn:
+            print("警告: 播放列表日志末尾不完整，已截断", file=sys.stderr)
+            self.needs_compact = True
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_end)
+        elif good_end and not last_complete:
+            # 最后一条记录完整但缺少换行，补上后再追加
+            with open(self.journal_path, 'ab') as f:
+                f.write(b"\n")
+        return ops
+
+    def _load_snapshot(self):
+        """
+        读取快照，不存在时返回 None。快照损坏时另存为带时间戳的 .bak 并返回 None（snapshot_failed 置位），
+        日志仍照常读取并在空状态上重放；调用方此时不应立即压缩，以免用不完整的数据覆盖。
+        """
+        self.snapshot_failed = False
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if isinstance(snapshot, dict):
+                return snapshot
+            error = "格式错误"
+        except json.JSONDecodeError as e:
+            error = e
+        except OSError as e:
+            print(f"读取播放列表快照失败: {e}", file=sys.stderr)
+            self.snapshot_failed = True
+            return None
+        self.discard_snapshot(error)
+        return None
+
+    @staticmethod
+    def _backup_path(path):
+        """带时间戳的备份文件名，已存在时加序号，不覆盖之前的备份"""
+        base = f"{path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        backup_path = base + ".bak"
+        index = 1
+        while os.path.exists(backup_path):
+            backup_path = f"{base}-{index}.bak"
+            index += 1
+        return backup_path
+
+    def discard_snapshot(self, reason):
+        """快照损坏：另存为带时间戳的 .bak 供手动恢复，之后的压缩不会覆盖它"""
+        backup_path = self._backup_path(self.snapshot_path)
+        try:
+            os.replace(self.snapshot_path, backup_path)
+            print(f"警告: 播放列表快照已损坏（{reason}），已另存为 {backup_path}", file=sys.stderr)
+        except OSError as e:
+            print(f"警告: 播放列表快照已损坏（{reason}），备份失败: {e}", file=sys.stderr)
+        self.snapshot_failed = True
+
+    def append(self, op):
+        """追加一条操作记录，返回是否需要压缩"""
+        return self.append_many([op])
+
+    def append_many(self, ops):
+        """一次写入多条操作记录（批量修改只写一次、刷新一次），返回是否需要压缩"""
+        lines = []
+        for op in ops:
+            self.seq += 1
+            op["seq"] = self.seq
+            lines.append(json.dumps(op, ensure_ascii=False) + "\n")
+        try:
+            if self._file is None:
+                self._file = open(self.journal_path, 'a', encoding='utf-8')
+            self._file.write("".join(lines))
+            self._file.flush()
+            self.appends += 1
+            self.pending_ops += len(lines)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"写入播放列表日志失败: {e}", file=sys.stderr)
+        return self.pending_ops >= self.compact_threshold
+
+    def compact(self, data):
+        """把完整数据写成新的快照（临时文件 + 原子替换），然后清空日志"""
+        temp_path = self.snapshot_path + ".tmp"
+        data = dict(data, journal_seq=self.seq)
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.snapshot_path)
+        except (OSError, TypeError, ValueError) as e:
+            # 快照写入失败时保留日志，下次加载仍可恢复
+            print(f"保存播放列表失败: {e}", file=sys.stderr)
+            return False
+        self.close()
+        try:
+            if self.snapshot_failed and os.path.exists(self.journal_path):
+                # 快照损坏后的第一次压缩：日志与 .bak 快照一起保留，供手动恢复
+                os.replace(self.journal_path, self._backup_path(self.journal_path))
+            open(self.journal_path, 'w').close()
+        except OSError as e:
+            print(f"清空播放列表日志失败: {e}", file=sys.stderr)
+        self.pending_ops = 0
+        self.needs_compact = False
+        self.snapshot_failed = False
+        self.compactions += 1
+        return True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def get_stats(self):
+        """获取写入统计"""
+        return {
+            "appends": self.appends,
+            "compactions": self.compactions,
+            "pending_ops": self.pending_ops,
+        }
@@ -1,33 +1,111 @@
 import json
 import os
-from .config import CONFIG_PATH
+from contextlib import contextmanager
+from .config import CONFIG_PATH, Config
+from .playlist_journal import PlaylistJournal
+from .track_table import TrackTable, Playlist
 
 
 class PlaylistManager:
-    """播放列表管理器"""
+    """
+    播放列表管理器。每次修改只向日志追加一条记录（见 PlaylistJournal），
+    日志累积到一定条数或程序退出时才整体写入快照。
+    在 batch() 中进行的多次修改合并为一次日志写入和一次变更通知。
+    所有播放列表共用一张曲目表（TrackTable），列表中只保存整数ID，不再被任何列表包含的曲目随即释放。
+    """
     
     def __init__(self, config_path=None):
         self.config_path = config_path or CONFIG_PATH
-        self.playlists = {}  # 播放列表字典 {name: [file_paths]}
-        self.next_play_queue = []  # 下一首播放队列
+        self.tracks = TrackTable()
+        self.playlists = {}  # 播放列表字典 {name: Playlist}
         self.current_playlist = "默认播放列表"
+        self.journal = PlaylistJournal(self.config_path, Config.PLAYLIST_JOURNAL_COMPACT_OPS)
+        self._replaying = False  # 加载时重放日志，不再重复记录
+        self._batch_depth = 0
+        self._batch_ops = []  # 批量修改中尚未写入日志的记录
+        self._batch_changes = []  # 批量修改中尚未通知的变更 [(来源, 记录), ...]
+        self._listeners = []  # [(回调, 来源), ...]
         self.load_playlists()
+
+    def add_listener(self, callback, origin=None):
+        """
+        注册变更通知：每次修改（或每个批量修改结束时）以变更记录列表调用 callback。
+        由 origin 自己发起的修改（修改方法传入相同的 origin）不会通知给它。
+        """
+        self._listeners.append((callback, origin))
+
+    @contextmanager
+    def batch(self):
+        """批量修改：其中的所有修改只写一次日志，结束时只发出一次变更通知"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                ops, self._batch_ops = self._batch_ops, []
+                changes, self._batch_changes = self._batch_changes, []
+                if ops and self.journal.append_many(ops):
+                    self.save_playlists()
+                self._notify(changes)
+
+    def _record(self, op, origin=None, **fields):
+        """记录一次修改，日志过长时压缩为快照"""
+        if self._replaying:
+            return
+        fields["op"] = op
+        if self._batch_depth:
+            self._batch_ops.append(fields)
+            self._batch_changes.append((origin, fields))
+            return
+        if self.journal.append(fields):
+            self.save_playlists()
+        self._notify([(origin, fields)])
+
+    def _notify(self, changes):
+        for callback, listener_origin in self._listeners:
+            relevant = [change for origin, change in changes
+                        if origin is None or origin is not listener_origin]
+            if relevant:
+                callback(relevant)
+
+    def _apply_op(self, op):
+        """重放一条日志记录"""
+        kind = op.get("op")
+        if kind == "create":
+            self.create_playlist(op["name"])
+        elif kind == "delete":
+            self.delete_playlist(op["name"])
+        elif kind == "rename":
+            self.rename_playlist(op["old"], op["new"])
+        elif kind == "add":
+            self.add_to_playlist(op["name"], op["path"])
+        elif kind == "remove":
+            self.remove_from_playlist(op["name"], op["path"])
+        elif kind == "add_many":
+            self.add_many(op["name"], op["paths"])
+        elif kind == "remove_many":
+            self.remove_many(op["name"], op["paths"])
+        elif kind == "move":
+            self.move_in_playlist(op["name"], op["old"], op["new"])
+        elif kind == "current":
+            self.set_current_playlist(op["name"])
     
     def create_playlist(self, name):
         """创建新播放列表"""
         if name not in self.playlists:
-            self.playlists[name] = []
-            self.save_playlists()
+            self.playlists[name] = Playlist(self.tracks)
+            self._record("create", name=name)
             return True
         return False
     
     def delete_playlist(self, name):
         """删除播放列表"""
         if name in self.playlists and name != "默认播放列表":
-            del self.playlists[name]
+            self.playlists.pop(name).clear()
             if self.current_playlist == name:
                 self.current_playlist = "默认播放列表"
-            self.save_playlists()
+            self._record("delete", name=name)
             return True
         return False
     
@@ -37,30 +115,83 @@ class PlaylistManager:
             self.playlists[new_name] = self.playlists.pop(old_name)
             if self.current_playlist == old_name:
                 self.current_playlist = new_name
-            self.save_playlists()
+            self._record("rename", old=old_name, new=new_name)
             return True
         return False
     
-    def add_to_playlist(self, playlist_name, file_path):
+    def add_to_playlist(self, playlist_name, file_path, origin=None):
         """添加文件到播放列表"""
-        if playlist_name in self.playlists:
-            if file_path not in self.playlists[playlist_name]:
-                self.playlists[playlist_name].append(file_path)
-                self.save_playlists()
-                return True
+        playlist = self.playlists.get(playlist_name)
+        if playlist is not None and playlist.extend([self.tracks.intern(file_path)]):
+            self._record("add", origin, name=playlist_name, path=file_path)
+            return True
         return False
     
-    def remove_from_playlist(self, playlist_name, file_path):
+    def remove_from_playlist(self, playlist_name, file_path, origin=None):
         """从播放列表移除文件"""
-        if playlist_name in self.playlists and file_path in self.playlists[playlist_name]:
-            self.playlists[playlist_name].remove(file_path)
-            self.save_playlists()
+        playlist = self.playlists.get(playlist_name)
+        track_id = self.tracks.id_of(file_path)
+        if playlist is not None and track_id is not None and playlist.remove([track_id]):
+            self._record("remove", origin, name=playlist_name, path=file_path)
             return True
         return False
+
+    def add_many(self, playlist_name, file_paths, origin=None):
+        """批量添加文件（已存在的和重复的跳过），返回实际添加的路径列表"""
+        playlist = self.playlists.get(playlist_name)
+        if playlist is None:
+            return []
+        added = playlist.extend([self.tracks.intern(path) for path in file_paths])
+        added = [self.tracks.path(track_id) for track_id in added]
+        if added:
+            self._record("add_many", origin, name=playlist_name, paths=added)
+        return added
+
+    def remove_many(self, playlist_name, file_paths, origin=None):
+        """批量移除文件（一次遍历），返回实际移除的路径列表"""
+        playlist = self.playlists.get(playlist_name)
+        if not playlist:
+            return []
+        return self._remove_ids(playlist_name, playlist, self._ids_of(file_paths), origin)
+
+    def remove_from_all(self, file_paths, origin=None):
+        """从所有播放列表中移除文件，返回 {播放列表名: 移除的路径列表}"""
+        track_ids = self._ids_of(file_paths)
+        result = {}
+        if not track_ids:
+            return result
+        with self.batch():
+            for name, playlist in list(self.playlists.items()):
+                # 先用ID集合判断，不包含这些曲目的列表无需遍历
+                if not playlist.members.isdisjoint(track_ids):
+                    removed = self._remove_ids(name, playlist, track_ids, origin)
+                    if removed:
+                        result[name] = removed
+        return result
+
+    def _ids_of(self, file_paths):
+        ids = set()
+        for path in file_paths:
+            track_id = self.tracks.id_of(path)
+            if track_id is not None:
+                ids.add(track_id)
+        return ids
+
+    def _remove_ids(self, playlist_name, playlist, track_ids, origin):
+        removed = playlist.remove(track_ids)
+        if removed:
+            self._record("remove_many", origin, name=playlist_name, paths=removed)
+        return removed
+
+    def contains(self, playlist_name, file_path):
+        """文件是否在播放列表中（常数时间）"""
+        playlist = self.playlists.get(playlist_name)
+        return playlist is not None and file_path in playlist
     
     def get_playlist(self, name):
-        """获取指定播放列表"""
-        return self.playlists.get(name, [])
+        """获取指定播放列表（可按下标取路径、可遍历的 Playlist）"""
+        playlist = self.playlists.get(name)
+        return playlist if playlist is not None else Playlist(self.tracks)
     
     def get_playlist_names(self):
         """获取所有播放列表名称"""
@@ -70,59 +201,38 @@ class PlaylistManager:
         """设置当前播放列表"""
         if name in self.playlists:
             self.current_playlist = name
-            self.save_playlists()
+            self._record("current", name=name)
             return True
         return False
     
-    def add_to_next_play(self, file_path):
-        """添加到下一首播放队列"""
-        if file_path not in self.next_play_queue:
-            self.next_play_queue.append(file_path)
-    
-    def get_next_from_queue(self):
-        """从队列获取下一首"""
-        if self.next_play_queue:
-            return self.next_play_queue.pop(0)
-        return None
-    
-    def clear_next_play_queue(self):
-        """清空下一首播放队列"""
-        self.next_play_queue = []
-    
-    def move_in_playlist(self, playlist_name, old_index, new_index):
+    def move_in_playlist(self, playlist_name, old_index, new_index, origin=None):
         """在播放列表中移动项目"""
         if playlist_name in self.playlists:
             playlist = self.playlists[playlist_name]
             if 0 <= old_index < len(playlist) and 0 <= new_index < len(playlist):
-                item = playlist.pop(old_index)
-                playlist.insert(new_index, item)
-                self.save_playlists()
+                playlist.move(old_index, new_index)
+                self._record("move", origin, name=playlist_name, old=old_index, new=new_index)
                 return True
         return False
     
     def load_playlists(self):
-        """加载播放列表"""
+        """加载播放列表：读取快照并重放之后的日志"""
+        migrated = False
+        ops = []
+        raw_playlists = {}  # {name: [file_paths]}，读取后统一转换为 Playlist
         try:
-            playlist_file = os.path.join(self.config_path, "playlists.json")
-            if os.path.exists(playlist_file):
-                with open(playlist_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.playlists = data.get("playlists", {})
-                    self.current_playlist = data.get("current_playlist", "默认播放列表")
-                    
-                    # 确保所有播放列表都是列表格式
-                    for name, playlist in self.playlists.items():
-                        if not isinstance(playlist, list):
-                            print(f"警告: 播放列表 '{name}' 数据格式错误，重置为空列表")
-                            self.playlists[name] = []
-                    
-                    # 确保默认播放列表存在
-                    if "默认播放列表" not in self.playlists:
-                        self.playlists["默认播放列表"] = []
-            else:
-                # 初始化默认播放列表
-                self.playlists = {"默认播放列表": []}
+            snapshot, ops = self.journal.load()
+            if snapshot is not None:
+                data = snapshot
+                raw_playlists = data.get("playlists", {})
+                self.current_playlist = data.get("current_playlist", "默认播放列表")
                 
+                # 确保所有播放列表都是列表格式
+                for name, playlist in raw_playlists.items():
+                    if not isinstance(playlist, list):
+                        print(f"警告: 播放列表 '{name}' 数据格式错误，重置为空列表")
+                        raw_playlists[name] = []
+            elif not self.journal.snapshot_failed:
                 # 尝试迁移旧的播放列表
                 old_playlist_file = os.path.join(self.config_path, "playlist.json")
                 if os.path.exists(old_playlist_file):
@@ -130,68 +240,60 @@ class PlaylistManager:
                         with open(old_playlist_file, 'r', encoding='utf-8') as f:
                             old_playlist = json.load(f)
                             if isinstance(old_playlist, list):
-                                self.playlists["默认播放列表"] = old_playlist
+                                raw_playlists = {"默认播放列表": old_playlist}
+                                migrated = True
                             else:
                                 print("警告: 旧播放列表格式错误，使用空列表")
-                                self.playlists["默认播放列表"] = []
                     except (json.JSONDecodeError, FileNotFoundError):
                         pass
                         
-        except (json.JSONDecodeError, FileNotFoundError):
-            self.playlists = {"默认播放列表": []}
+        except (AttributeError, TypeError):
+            # 快照结构不对：保留备份，在空状态上重放日志
+            raw_playlists = {}
             self.current_playlist = "默认播放列表"
-    
-    def save_playlists(self):
-        """保存播放列表"""
-        # 防止递归调用
-        if hasattr(self, '_saving_playlists') and self._saving_playlists:
-            return
-        
-        self._saving_playlists = True
-        
+            self.journal.discard_snapshot("格式错误")
+
+        # 只保留非空的文件路径字符串，路径转换为曲目ID
+        self.playlists = {
+            str(name): Playlist(self.tracks, [
+                item.strip() for item in paths if isinstance(item, str) and item.strip()
+            ])
+            for name, paths in raw_playlists.items()
+        }
+        # 确保默认播放列表存在
+        if "默认播放列表" not in self.playlists:
+            self.playlists["默认播放列表"] = Playlist(self.tracks)
+
+        # 重放快照之后的修改
+        self._replaying = True
         try:
-            playlist_file = os.path.join(self.config_path, "playlists.json")
-            
-            # 确保数据结构正确，避免循环引用
-            clean_playlists = {}
-            for name, playlist in self.playlists.items():
-                if isinstance(playlist, list):
-                    # 只保存文件路径字符串，并过滤掉非字符串项
-                    clean_list = []
-                    for item in playlist:
-                        if isinstance(item, str) and item.strip():
-                            clean_list.append(item.strip())
-                    clean_playlists[str(name)] = clean_list
-                else:
-                    clean_playlists[str(name)] = []
-            
-            # 确保current_playlist是字符串
-            current_playlist = str(self.current_playlist) if self.current_playlist else "默认播放列表"
-            
-            data = {
-                "playlists": clean_playlists,
-                "current_playlist": current_playlist
-            }
-            
-            # 验证数据结构
-            try:
-                json.dumps(data, ensure_ascii=False)  # 测试序列化
-            except (TypeError, ValueError) as validation_error:
-                # 如果验证失败，使用安全的默认数据
-                data = {
-                    "playlists": {"默认播放列表": []},
-                    "current_playlist": "默认播放列表"
-                }
-            
-            with open(playlist_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                
-        except Exception as e:
-            # 任何错误都不再尝试递归操作
-            try:
-                with open(os.path.join(self.config_path, "playlists_backup.json"), 'w', encoding='utf-8') as f:
-                    json.dump({"playlists": {"默认播放列表": []}, "current_playlist": "默认播放列表"}, f)
-            except:
-                pass  # 静默失败
+            for op in ops:
+                try:
+                    self._apply_op(op)
+                except (KeyError, TypeError, AttributeError):
+                    print(f"警告: 忽略无效的播放列表日志记录 {op}")
         finally:
-            self._saving_playlists = False 
\ No newline at end of file
+            self._replaying = False
+        if self.current_playlist not in self.playlists:
+            self.current_playlist = "默认播放列表"
+
+        # 把重放结果（或迁移的旧数据）合并为新快照，日志从空开始；
+        # 快照损坏时重放的只是日志中的部分修改，保留日志，不立即覆盖
+        if (ops or migrated or self.journal.needs_compact) and not self.journal.snapshot_failed:
+            self.save_playlists()
+
+    def save_playlists(self):
+        """把全部播放列表写入快照并清空日志（压缩）"""
+        # 确保current_playlist是字符串
+        current_playlist = str(self.current_playlist) if self.current_playlist else "默认播放列表"
+        
+        return self.journal.compact({
+            "playlists": {name: playlist.paths() for name, playlist in self.playlists.items()},
+            "current_playlist": current_playlist
+        })
+
+    def close(self):
+        """程序退出时调用：有未合并的日志时写入快照"""
+        if self.journal.pending_ops:
+            self.save_playlists()
+        self.journal.close()
@@ -0,0 +1,318 @@
+import os
+from PyQt6.QtWidgets import QListView, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+from PyQt6.QtGui import QColor
+from .track_table import TrackTable, Playlist
+
+
+class PlaylistModel(QAbstractListModel):
+    """
+    当前播放列表的数据模型，行与 PlaylistManager 中的路径列表一一对应。
+    增删和移动只发出对应行的插入/删除/移动通知，视图无需整体重建；
+    只有切换播放列表时才重置模型。模型同时维护 曲目ID→行号 的哈希索引，
+    按路径定位曲目为常数时间。文件是否存在由 FileStatusChecker 在后台检查，
+    列表立即显示，检查完成后把不存在的文件标记为灰色。
+    """
+
+    PathRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, playlist_manager, parent=None, file_status=None):
+        super().__init__(parent)
+        self.playlist_manager = playlist_manager
+        self.file_status = file_status  # 可选的 FileStatusChecker
+        self._missing_color = QColor(255, 255, 255, 90)
+        if file_status is not None:
+            file_status.status_ready.connect(self._on_status_ready)
+        self.playlist_name = None
+        self._paths = Playlist(TrackTable())  # 引用 PlaylistManager 中的当前播放列表（按行取路径）
+        self._rows = {}  # 曲目ID → 行号 的索引，随增删和移动同步更新
+        if playlist_manager is not None:
+            # 模型自己发起的修改已经逐行通知了视图，只处理其他地方对播放列表的修改
+            playlist_manager.add_listener(self._on_playlist_changed, origin=self)
+
+    # --- Qt 模型接口 ---
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._paths)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._paths):
+            return None
+        path = self._paths[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(path)
+        if role == self.PathRole:
+            return path
+        missing = self.file_status is not None and self.file_status.is_missing(path)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{path}（文件不存在）" if missing else path
+        if role == Qt.ItemDataRole.ForegroundRole and missing:
+            return self._missing_color
+        return None
+
+    def is_missing(self, row):
+        """已知该行的文件不存在时返回 True"""
+        path = self.path_at(row)
+        return path is not None and self.file_status is not None and self.file_status.is_missing(path)
+
+    def _on_status_ready(self, paths):
+        """一批文件检查完成，只刷新其中不存在的文件所在的行"""
+        rows = [self.row_of(path) for path in paths if self.file_status.is_missing(path)]
+        rows = [row for row in rows if row >= 0]
+        if rows:
+            roles = [Qt.ItemDataRole.ForegroundRole, Qt.ItemDataRole.ToolTipRole]
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)), roles)
+
+    def flags(self, index):
+        if not index.isValid():
+            # 允许拖放到列表末尾的空白处
+            return Qt.ItemFlag.ItemIsDropEnabled
+        return (Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+                | Qt.ItemFlag.ItemIsDragEnabled)
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    # --- 播放列表操作 ---
+    def set_playlist(self, name):
+        """切换到指定播放列表（整体重置一次）"""
+        self.beginResetModel()
+        self.playlist_name = name
+        self._paths = self.playlist_manager.get_playlist(name) if self.playlist_manager else Playlist(TrackTable())
+        self._rebuild_index()
+        self.endResetModel()
+        if self.file_status is not None:
+            # 放弃上一个播放列表未完成的检查，后台检查当前列表
+            self.file_status.cancel_pending()
+            self.file_status.request(list(self._paths))
+
+    def reload(self):
+        """重新读取当前播放列表"""
+        self.set_playlist(self.playlist_manager.current_playlist if self.playlist_manager else None)
+
+    def path_at(self, row):
+        """获取指定行的文件路径，越界时返回 None"""
+        if 0 <= row < len(self._paths):
+            return self._paths[row]
+        return None
+
+    def paths(self):
+        """当前播放列表的全部路径（只读）"""
+        return self._paths
+
+    def row_of(self, path):
+        """获取文件所在的行，不在列表中时返回 -1"""
+        track_id = self._paths.table.id_of(path)
+        if track_id is None or track_id not in self._paths.members:
+            return -1
+        row = self._rows.get(track_id, -1)
+        if row < 0 or row >= len(self._paths) or self._paths.id_at(row) != track_id:
+            # 列表在模型之外被修改过，重建索引
+            self._rebuild_index()
+            row = self._rows.get(track_id, -1)
+        return row
+
+    def _rebuild_index(self):
+        self._rows = {track_id: row for row, track_id in enumerate(self._paths.ids)}
+
+    def _reindex(self, start, end):
+        """更新 [start, end) 范围内各行的索引"""
+        ids = self._paths.ids
+        rows = self._rows
+        for row in range(start, min(end, len(ids))):
+            rows[ids[row]] = row
+
+    def _is_live(self):
+        """显示的列表仍是 PlaylistManager 中的列表，修改一定会成功（先确认再发出开始修改的通知）"""
+        manager = self.playlist_manager
+        return manager is not None and manager.playlists.get(self.playlist_name) is self._paths
+
+    def add_path(self, path):
+        """在列表末尾添加文件，已存在时返回 False"""
+        if not self._is_live() or self.row_of(path) >= 0:
+            return False
+        row = len(self._paths)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.playlist_manager.add_to_playlist(self.playlist_name, path, origin=self)
+        self._rows[self._paths.id_at(row)] = row
+        self.endInsertRows()
+        if self.file_status is not None:
+            self.file_status.request([path])
+        return True
+
+    def remove_path(self, path):
+        """从列表中移除文件，不在列表中时返回 False"""
+        row = self.row_of(path)
+        if row < 0 or not self._is_live():
+            return False
+        track_id = self._paths.id_at(row)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.playlist_manager.remove_from_playlist(self.playlist_name, path, origin=self)
+        # 被移除行之后的行号整体前移
+        self._rows.pop(track_id, None)
+        self._reindex(row, len(self._paths))
+        self.endRemoveRows()
+        return True
+
+    def add_paths(self, paths):
+        """批量添加文件到列表末尾（一次插入通知、一次日志写入），返回实际添加的路径"""
+        if not self._is_live():
+            return []
+        new_paths = []
+        seen = set()
+        for path in paths:
+            if path not in seen and self.row_of(path) < 0:
+                seen.add(path)
+                new_paths.append(path)
+        if not new_paths:
+            return []
+        start = len(self._paths)
+        self.beginInsertRows(QModelIndex(), start, start + len(new_paths) - 1)
+        added = self.playlist_manager.add_many(self.playlist_name, new_paths, origin=self)
+        self._reindex(start, len(self._paths))
+        self.endInsertRows()
+        if added and self.file_status is not None:
+            self.file_status.request(added)
+        return added
+
+    def remove_paths(self, paths):
+        """批量移除文件：每段连续的行发出一次删除通知，日志只写一次，返回实际移除的路径"""
+        if not self._is_live():
+            return []
+        rows = sorted({row for row in (self.row_of(path) for path in paths) if row >= 0})
+        if not rows:
+            return []
+        # 把行号分成连续的区间，从后往前删除，前面区间的行号不受影响
+        ranges = []
+        start = prev = rows[0]
+        for row in rows[1:]:
+            if row != prev + 1:
+                ranges.append((start, prev))
+                start = row
+            prev = row
+        ranges.append((start, prev))
+        removed = []
+        with self.playlist_manager.batch():
+            for first, last in reversed(ranges):
+                section = [self._paths[row] for row in range(first, last + 1)]
+                self.beginRemoveRows(QModelIndex(), first, last)
+                for row in range(first, last + 1):
+                    self._rows.pop(self._paths.id_at(row), None)
+                removed[:0] = self.playlist_manager.remove_many(self.playlist_name, section, origin=self)
+                self.endRemoveRows()
+        # 第一个被删除的行之后的行号都已前移
+        self._reindex(rows[0], len(self._paths))
+        return removed
+
+    def _on_playlist_changed(self, changes):
+        """当前播放列表在模型之外被修改（或被重命名、删除）时重新读取一次"""
+        name = self.playlist_name
+        for change in changes:
+            if change["op"] == "current":
+                continue
+            if change.get("name") == name or change.get("old") == name:
+                manager = self.playlist_manager
+                self.set_playlist(name if name in manager.playlists else manager.current_playlist)
+                return
+
+    def move_row(self, source, target):
+        """把第 source 行移动到第 target 行（均为移动前的行号）"""
+        count = len(self._paths)
+        if source == target or not (0 <= source < count and 0 <= target < count) or not self._is_live():
+            return False
+        # beginMoveRows 的目标位置是插入点：向下移动时需要越过目标行
+        destination = target + 1 if target > source else target
+        if not self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), destination):
+            return False
+        self.playlist_manager.move_in_playlist(self.playlist_name, source, target, origin=self)
+        # 只有移动区间内的行号发生变化
+        self._reindex(min(source, target), max(source, target) + 1)
+        self.endMoveRows()
+        return True
+
+
+class PlaylistFilterProxy(QSortFilterProxyModel):
+    """
+    按搜索结果过滤播放列表。匹配的路径集合由 SearchIndex 一次算好，
+    set_matches 之后只触发一次整体重新过滤，不再逐行切换隐藏状态。
+    """
+
+    def __init__(self, search_index, parent=None):
+        super().__init__(parent)
+        self.search_index = search_index
+        self.query = ""
+        self.matches = None  # 匹配的路径集合，None 表示不过滤
+
+    def set_matches(self, query, matches):
+        """应用一次搜索结果（matches 为 None 时显示全部）"""
+        self.query = query
+        self.matches = matches
+        self.invalidateFilter()
+
+    def reset_matches(self):
+        """源模型重置（例如切换播放列表）时丢弃旧的搜索结果，下一次搜索重新查索引"""
+        self.query = ""
+        self.matches = None
+
+    def discard(self, path):
+        """路径被移出播放列表时同步移出搜索结果"""
+        if self.matches is not None:
+            self.matches.discard(path)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.matches is None:
+            return True
+        path = self.sourceModel().path_at(source_row)
+        if path in self.matches:
+            return True
+        if path is None or path in self.search_index:
+            return False
+        # 搜索之后新加入（尚未建立索引）的路径，单独判断一次
+        if self.search_index.matches(path, self.query):
+            self.matches.add(path)
+            return True
+        return False
+
+
+class PlaylistView(QListView):
+    """
+    播放列表视图：所有行高度相同，只布局和绘制可见的行；
+    拖放排序直接调用模型的 move_row，不经过整行的数据序列化和删除重建。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.setDefaultDropAction(Qt.DropAction.MoveAction)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+
+    def dropEvent(self, event):
+        model = self.model()
+        # 视图可能显示的是过滤后的代理模型，行号需映射回播放列表模型
+        proxy = model if isinstance(model, QSortFilterProxyModel) else None
+        playlist_model = proxy.sourceModel() if proxy is not None else model
+        source = self.currentIndex().row()
+        if event.source() is not self or source < 0 or not isinstance(playlist_model, PlaylistModel):
+            event.ignore()
+            return
+        index = self.indexAt(event.position().toPoint())
+        if not index.isValid():
+            insert_at = model.rowCount()
+        else:
+            insert_at = index.row()
+            if self.dropIndicatorPosition() == QAbstractItemView.DropIndicatorPosition.BelowItem:
+                insert_at += 1
+        target = insert_at - 1 if insert_at > source else insert_at
+        if proxy is not None:
+            source = proxy.mapToSource(proxy.index(source, 0)).row()
+            target = proxy.mapToSource(proxy.index(target, 0)).row()
+        if playlist_model.move_row(source, target):
+            target_index = playlist_model.index(target)
+            self.setCurrentIndex(proxy.mapFromSource(target_index) if proxy is not None else target_index)
+        # 不使用 MoveAction，否则视图会在拖动结束后删除源行
+        event.setDropAction(Qt.DropAction.CopyAction)
+        event.accept()
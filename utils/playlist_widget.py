@@ -3,25 +3,43 @@ import subprocess
 import sys
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QLineEdit,
-    QListWidget, QListWidgetItem, QMenu, QMessageBox, QDialog
+    QMenu, QMessageBox, QDialog, QAbstractItemView
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QSize
-from PyQt6.QtGui import QFont
-from .config import ASSETS_PATH
+from PyQt6.QtCore import Qt, pyqtSignal, QSize, QTimer
+from PyQt6.QtGui import QFont, QActionGroup
+from .config import ASSETS_PATH, Config
 from .helpers import create_icon, get_icon_path
 from .dialogs import PlaylistManagerDialog
+from .playlist_model import PlaylistModel, PlaylistFilterProxy, PlaylistView
+from .file_status import FileStatusChecker
+from .search_index import SearchIndex, normalize_query
 
 
 class CollapsiblePlaylist(QWidget):
     play_signal = pyqtSignal(str)
-    performance_mode_toggled = pyqtSignal(bool)
+    performance_profile_selected = pyqtSignal(str)  # 选择性能档位信号
     add_music_requested = pyqtSignal()
     add_to_next_play_requested = pyqtSignal(str)  # 添加到下一首播放信号
+    add_to_play_later_requested = pyqtSignal(str)  # 添加到播放队列末尾信号
     locate_current_song_requested = pyqtSignal()  # 定位当前歌曲信号
+    selection_changed = pyqtSignal()  # 播放列表选中项变化信号
     
     def __init__(self, parent=None, playlist_manager=None):
         super().__init__(parent)
         self.playlist_manager = playlist_manager
+        # 文件是否存在在后台线程池中检查，列表无需等待即可显示
+        self.file_status = FileStatusChecker(Config.FILE_STATUS_TTL_SECONDS, parent=self)
+        self.model = PlaylistModel(playlist_manager, self, self.file_status)
+        # 搜索索引在第一次搜索时才建立，之后随模型的增删同步更新
+        self.search_index = SearchIndex()
+        self.proxy = PlaylistFilterProxy(self.search_index, self)
+        self.proxy.setSourceModel(self.model)
+        self.model.rowsInserted.connect(self._on_rows_inserted)
+        self.model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        self.model.modelAboutToBeReset.connect(self.search_index.clear)
+        self.model.modelAboutToBeReset.connect(self.proxy.reset_matches)
+        # 模型重置后（切换播放列表或在别处被修改）按当前搜索词重新过滤
+        self.model.modelReset.connect(self.apply_search)
         self.setup_ui()
         self.refresh_playlist_display()
         
@@ -58,14 +76,28 @@ class CollapsiblePlaylist(QWidget):
         self.locate_btn.clicked.connect(self.locate_current_song_requested.emit)
         top_row_layout.addWidget(self.locate_btn)
         
-        # 性能模式按钮（改为图标）
+        # 性能档位按钮（点击弹出档位菜单）
         self.performance_mode_btn = QPushButton()
         self.performance_mode_btn.setIcon(create_icon(get_icon_path("performance.svg")))
-        self.performance_mode_btn.setCheckable(True)
         self.performance_mode_btn.setObjectName("PerformanceModeButton")
         self.performance_mode_btn.setToolTip("性能模式")
         self.performance_mode_btn.setFixedSize(32, 32)
-        self.performance_mode_btn.toggled.connect(self.performance_mode_toggled.emit)
+        self.performance_menu = QMenu(self)
+        self.performance_actions = QActionGroup(self)
+        self.performance_actions.setExclusive(True)
+        for name, profile in Config.PERFORMANCE_PROFILES.items():
+            action = self.performance_menu.addAction(profile["label"])
+            action.setCheckable(True)
+            action.setData(name)
+            self.performance_actions.addAction(action)
+        self.performance_actions.triggered.connect(
+            lambda action: self.performance_profile_selected.emit(action.data())
+        )
+        self.performance_mode_btn.clicked.connect(
+            lambda: self.performance_menu.exec(
+                self.performance_mode_btn.mapToGlobal(self.performance_mode_btn.rect().bottomLeft())
+            )
+        )
         top_row_layout.addWidget(self.performance_mode_btn)
         
         # 设置按钮
@@ -92,16 +124,23 @@ class CollapsiblePlaylist(QWidget):
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("搜索播放列表...")
         self.search_box.setObjectName("SearchBox")
-        self.search_box.textChanged.connect(self.filter_playlist)
+        # 输入停顿后才搜索，连续输入时不逐键过滤
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(Config.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_box.textChanged.connect(self.search_timer.start)
         layout.addWidget(self.search_box)
 
-        # 创建播放列表
-        self.playlist_widget = QListWidget()
+        # 创建播放列表（模型/视图，只渲染可见的行）
+        self.playlist_widget = PlaylistView()
+        self.playlist_widget.setModel(self.proxy)
+        self.playlist_widget.selectionModel().selectionChanged.connect(self.selection_changed.emit)
         self.playlist_widget.setAlternatingRowColors(False)  # 移除交替颜色
         self.playlist_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.playlist_widget.customContextMenuRequested.connect(self.show_context_menu)
         self.playlist_widget.setStyleSheet('''
-            QListWidget {
+            QListView {
                 background: transparent;
                 border: none;
                 color: white;
@@ -109,11 +148,11 @@ class CollapsiblePlaylist(QWidget):
                 font-weight: bold; /* 字体加粗 */
                 padding-right: 5px; /* 为滚动条留出空间 */
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 8px 12px;
                 border-bottom: 1px solid rgba(255,255,255,0.1);
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background: rgba(33,150,243,0.25);
                 border-radius: 8px;
                 color: #BBBBBB; /* 将选中项文字颜色改为灰色 */
@@ -169,10 +208,7 @@ class CollapsiblePlaylist(QWidget):
                 background: none;
             }
         ''')
-        self.playlist_widget.itemDoubleClicked.connect(self.on_item_double_clicked)
-        # 启用拖放
-        self.playlist_widget.setDragDropMode(QListWidget.DragDropMode.InternalMove)
-        self.playlist_widget.model().rowsMoved.connect(self.on_item_moved)
+        self.playlist_widget.doubleClicked.connect(self.on_item_double_clicked)
         layout.addWidget(self.playlist_widget)
         
         # 播放列表管理按钮，移到播放列表下方
@@ -191,26 +227,103 @@ class CollapsiblePlaylist(QWidget):
         
         layout.addLayout(manage_button_layout)
 
-    def filter_playlist(self, text):
-        for i in range(self.playlist_widget.count()):
-            item = self.playlist_widget.item(i)
-            file_name = os.path.basename(item.data(Qt.ItemDataRole.UserRole))
-            item.setHidden(text.lower() not in file_name.lower())
+    def set_performance_profile(self, name):
+        """在档位菜单中勾选当前档位（不发出信号）"""
+        for action in self.performance_actions.actions():
+            if action.data() == name:
+                action.setChecked(True)
+
+    # --- 供主窗口使用的访问接口 ---
+    def count(self):
+        """当前播放列表的曲目数"""
+        return self.model.rowCount()
+
+    def path_at(self, row):
+        """获取指定行的文件路径，越界时返回 None"""
+        return self.model.path_at(row)
+
+    def row_of(self, file_path):
+        """获取文件所在的行，不在当前播放列表中时返回 -1"""
+        return self.model.row_of(file_path)
+
+    def is_missing(self, row):
+        """已知该行的文件不存在时返回 True（尚未检查完成时视为存在）"""
+        return self.model.is_missing(row)
+
+    def is_path_missing(self, file_path):
+        """已知文件不存在时返回 True（使用后台检查的结果，不在界面线程访问磁盘）"""
+        return self.file_status.is_missing(file_path)
+
+    def check_paths(self, paths):
+        """请求后台检查一组文件是否存在（例如加入播放队列的曲目）"""
+        self.file_status.request(paths)
+
+    def selected_path(self):
+        """当前选中项的文件路径，没有选中项时返回 None"""
+        rows = self.playlist_widget.selectionModel().selectedRows()
+        return rows[0].data(PlaylistModel.PathRole) if rows else None
+
+    def set_current_row(self, row):
+        """选中指定行（播放列表中的行号，被搜索过滤掉时不选中）"""
+        if 0 <= row < self.model.rowCount():
+            index = self.proxy.mapFromSource(self.model.index(row))
+            if index.isValid():
+                self.playlist_widget.setCurrentIndex(index)
+
+    def _path_at_position(self, position):
+        """获取视图坐标处的文件路径"""
+        index = self.playlist_widget.indexAt(position)
+        return index.data(PlaylistModel.PathRole) if index.isValid() else None
+
+    def apply_search(self):
+        """按搜索框内容过滤播放列表，结果一次性交给代理模型"""
+        self.search_timer.stop()
+        query = normalize_query(self.search_box.text())
+        previous = self.proxy.query
+        if not query:
+            if self.proxy.matches is not None:
+                self.proxy.set_matches("", None)
+            return
+        if query == previous and self.proxy.matches is not None:
+            return
+        within = None
+        if not self.search_index.built:
+            self.search_index.build(self.model.paths())
+        elif previous and previous in query and self.proxy.matches is not None:
+            # 查询词是在上一次基础上继续输入的，只需在上一次的结果中收窄
+            within = self.proxy.matches
+        self.proxy.set_matches(query, self.search_index.search(query, within))
+
+    def _on_rows_inserted(self, parent, first, last):
+        if self.search_index.built:
+            for row in range(first, last + 1):
+                self.search_index.add(self.model.path_at(row))
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        for row in range(first, last + 1):
+            path = self.model.path_at(row)
+            self.search_index.remove(path)
+            self.proxy.discard(path)
             
-    def on_item_double_clicked(self, item):
-        file_path = item.data(Qt.ItemDataRole.UserRole)
-        self.play_signal.emit(file_path)
+    def on_item_double_clicked(self, index):
+        file_path = index.data(PlaylistModel.PathRole)
+        if file_path:
+            self.play_signal.emit(file_path)
             
     def add_item(self, file_path):
         """添加文件到当前播放列表"""
         if self.playlist_manager:
-            current_playlist = self.playlist_manager.current_playlist
-            if self.playlist_manager.add_to_playlist(current_playlist, file_path):
-                self.refresh_playlist_display()
+            self.model.add_path(file_path)
+
+    def add_items(self, file_paths):
+        """批量添加文件到当前播放列表（一次插入、一次保存）"""
+        if self.playlist_manager:
+            self.model.add_paths(file_paths)
 
     def show_context_menu(self, position):
         """显示右键菜单"""
-        if not self.playlist_widget.itemAt(position):
+        index = self.playlist_widget.indexAt(position)
+        if not index.isValid():
             return
             
         menu = QMenu(self)
@@ -218,12 +331,16 @@ class CollapsiblePlaylist(QWidget):
         
         # 播放
         play_action = menu.addAction("播放")
-        play_action.triggered.connect(lambda: self.on_item_double_clicked(self.playlist_widget.itemAt(position)))
+        play_action.triggered.connect(lambda: self.on_item_double_clicked(index))
         
         # 下一首播放
         next_play_action = menu.addAction("下一首播放")
         next_play_action.triggered.connect(lambda: self.add_to_next_play(position))
         
+        # 稍后播放（追加到播放队列末尾）
+        play_later_action = menu.addAction("稍后播放")
+        play_later_action.triggered.connect(lambda: self.add_to_play_later(position))
+        
         # 打开文件位置
         open_location_action = menu.addAction("打开文件位置")
         open_location_action.triggered.connect(lambda: self.open_file_location(position))
@@ -243,18 +360,22 @@ class CollapsiblePlaylist(QWidget):
     
     def add_to_next_play(self, position):
         """添加到下一首播放队列"""
-        item = self.playlist_widget.itemAt(position)
-        if item:
-            file_path = item.data(Qt.ItemDataRole.UserRole)
+        file_path = self._path_at_position(position)
+        if file_path:
             self.add_to_next_play_requested.emit(file_path)
     
+    def add_to_play_later(self, position):
+        """添加到播放队列末尾"""
+        file_path = self._path_at_position(position)
+        if file_path:
+            self.add_to_play_later_requested.emit(file_path)
+    
     def open_file_location(self, position):
         """打开文件位置"""
-        item = self.playlist_widget.itemAt(position)
-        if not item:
+        file_path = self._path_at_position(position)
+        if not file_path:
             return
             
-        file_path = item.data(Qt.ItemDataRole.UserRole)
         if not os.path.exists(file_path):
             QMessageBox.warning(self, "文件不存在", f"文件 '{os.path.basename(file_path)}' 不存在")
             return
@@ -286,20 +407,16 @@ class CollapsiblePlaylist(QWidget):
     
     def remove_from_playlist(self, position):
         """从播放列表移除项目"""
-        item = self.playlist_widget.itemAt(position)
-        if item and self.playlist_manager:
-            file_path = item.data(Qt.ItemDataRole.UserRole)
-            current_playlist = self.playlist_manager.current_playlist
-            if self.playlist_manager.remove_from_playlist(current_playlist, file_path):
-                self.refresh_playlist_content_only()
+        file_path = self._path_at_position(position)
+        if file_path and self.playlist_manager:
+            self.model.remove_path(file_path)
     
     def delete_file_permanently(self, position):
         """永久删除文件"""
-        item = self.playlist_widget.itemAt(position)
-        if not item:
+        file_path = self._path_at_position(position)
+        if not file_path:
             return
             
-        file_path = item.data(Qt.ItemDataRole.UserRole)
         file_name = os.path.basename(file_path)
         
         reply = QMessageBox.question(
@@ -312,21 +429,20 @@ class CollapsiblePlaylist(QWidget):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                # 从所有播放列表中移除
+                # 从所有播放列表中移除（当前播放列表通过模型移除对应行），只保存一次
                 if self.playlist_manager:
-                    for playlist_name in self.playlist_manager.get_playlist_names():
-                        self.playlist_manager.remove_from_playlist(playlist_name, file_path)
+                    with self.playlist_manager.batch():
+                        self.model.remove_path(file_path)
+                        self.playlist_manager.remove_from_all([file_path])
                 
                 # 删除文件
+                self.file_status.invalidate(file_path)
                 if os.path.exists(file_path):
                     os.remove(file_path)
                     QMessageBox.information(self, "删除成功", f"文件 '{file_name}' 已被删除")
                 else:
                     QMessageBox.warning(self, "文件不存在", f"文件 '{file_name}' 不存在")
                 
-                # 刷新显示
-                self.refresh_playlist_content_only()
-                
             except Exception as e:
                 QMessageBox.critical(self, "删除失败", f"无法删除文件：{str(e)}")
     
@@ -340,9 +456,9 @@ class CollapsiblePlaylist(QWidget):
     def manage_playlists(self):
         """管理播放列表"""
         dialog = PlaylistManagerDialog(self, self.playlist_manager)
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.refresh_playlist_combo()
-            self.refresh_playlist_display()
+        dialog.exec()
+        # 对话框中可能删除了模型正在显示的播放列表，无论结果如何都重新读取
+        self.refresh_playlist_display()
     
     def refresh_playlist_combo(self):
         """刷新播放列表下拉框"""
@@ -385,22 +501,8 @@ class CollapsiblePlaylist(QWidget):
         """只刷新播放列表内容，不影响下拉框"""
         if not self.playlist_manager:
             return
-            
-        self.playlist_widget.clear()
-        current_playlist = self.playlist_manager.current_playlist
-        playlist = self.playlist_manager.get_playlist(current_playlist)
-        
-        for file_path in playlist:
-            if os.path.exists(file_path):
-                item = QListWidgetItem(os.path.basename(file_path))
-                item.setData(Qt.ItemDataRole.UserRole, file_path)
-                self.playlist_widget.addItem(item)
-    
-    def on_item_moved(self, parent, start, end, destination, row):
-        """处理项目移动"""
-        if self.playlist_manager:
-            current_playlist = self.playlist_manager.current_playlist
-            self.playlist_manager.move_in_playlist(current_playlist, start, row)
+        # 模型重置后会自动重新应用搜索（见 __init__ 中的 modelReset）
+        self.model.set_playlist(self.playlist_manager.current_playlist)
     
     def locate_current_song(self, current_file_path):
         """定位当前播放的歌曲"""
@@ -408,14 +510,18 @@ class CollapsiblePlaylist(QWidget):
             return
             
         # 查找当前播放歌曲在播放列表中的位置
-        for i in range(self.playlist_widget.count()):
-            item = self.playlist_widget.item(i)
-            if item and item.data(Qt.ItemDataRole.UserRole) == current_file_path:
-                # 选中并滚动到当前歌曲
-                self.playlist_widget.setCurrentRow(i)
-                self.playlist_widget.scrollToItem(item, QListWidget.ScrollHint.PositionAtCenter)
-                return
+        row = self.model.row_of(current_file_path)
+        if row >= 0:
+            # 当前歌曲被搜索过滤隐藏时先清空搜索
+            if not self.proxy.mapFromSource(self.model.index(row)).isValid():
+                self.search_box.clear()
+                self.apply_search()
+            # 选中并滚动到当前歌曲
+            self.set_current_row(row)
+            self.playlist_widget.scrollTo(
+                self.proxy.mapFromSource(self.model.index(row)), QAbstractItemView.ScrollHint.PositionAtCenter
+            )
+            return
         
         # 如果没有找到，显示提示
-        from PyQt6.QtWidgets import QMessageBox
-        QMessageBox.information(self, "提示", "当前播放的歌曲不在播放列表中") 
\ No newline at end of file
+        QMessageBox.information(self, "提示", "当前播放的歌曲不在播放列表中")
@@ -0,0 +1,144 @@
+import time
+from PyQt6.QtCore import QObject, QTimer, Qt
+
+
+class ScheduledTask:
+    """调度器中的一个周期任务"""
+
+    def __init__(self, name, callback, policy, timer):
+        self.name = name
+        self.callback = callback
+        # 各状态下的刷新间隔（毫秒），None 表示该状态下暂停：
+        # playing / paused 为窗口可见时，hidden_playing / hidden_paused 为窗口最小化、隐藏或被遮挡时
+        self.policy = dict(policy)
+        self.timer = timer
+        self.enabled = True  # 由调用方控制的开关（例如性能档位关闭了该任务）
+        self.suspended = False  # 任务自己暂停，直到下一次窗口或播放状态变化
+        self.interval = None  # 当前实际生效的间隔，None 表示未运行
+        self.wakeups = 0
+        self.busy_seconds = 0.0  # 回调累计耗时
+
+
+class TaskScheduler(QObject):
+    """
+    统一管理界面上所有的周期任务（频谱、进度、背景、设置写入等）。
+    根据窗口状态（可见/最小化/遮挡）和播放状态（播放/暂停）为每个任务选择刷新间隔或暂停，
+    并统计每个任务的唤醒次数，便于验证空闲时的CPU和电量消耗。
+    """
+
+    def __init__(self, parent=None, metrics=None):
+        super().__init__(parent)
+        self.metrics = metrics  # 可选的性能统计（PerfMetrics），同步唤醒计数
+        self._tasks = {}
+        self._visible = True
+        self._playing = False
+        self._stopped = False
+        self._started = time.monotonic()
+
+    def add_task(self, name, callback, policy, precise=False):
+        """注册任务，policy 为 {状态: 间隔毫秒或 None}，未列出的隐藏状态视为暂停"""
+        timer = QTimer(self)
+        timer.setTimerType(Qt.TimerType.PreciseTimer if precise else Qt.TimerType.CoarseTimer)
+        task = ScheduledTask(name, callback, policy, timer)
+        timer.timeout.connect(lambda: self._run(task))
+        self._tasks[name] = task
+        self._apply(task)
+        return task
+
+    def set_policy(self, name, **intervals):
+        """修改任务在某些状态下的间隔（例如切换性能档位时）"""
+        task = self._tasks[name]
+        task.policy.update(intervals)
+        self._apply(task)
+
+    def set_enabled(self, name, enabled):
+        task = self._tasks[name]
+        if task.enabled != enabled:
+            task.enabled = enabled
+            self._apply(task)
+
+    def suspend(self, name):
+        """暂停任务直到下一次窗口或播放状态变化（例如暂停后频谱已衰减到零）"""
+        task = self._tasks[name]
+        if not task.suspended:
+            task.suspended = True
+            self._apply(task)
+
+    def restart(self, name):
+        """重新开始任务的计时（用于静默期：每次有新的修改都把写入推迟一个间隔）"""
+        task = self._tasks[name]
+        if task.interval is not None:
+            task.timer.start(int(task.interval))
+
+    def is_enabled(self, name):
+        return self._tasks[name].enabled
+
+    def interval(self, name):
+        """任务当前生效的间隔（毫秒），暂停时返回 None"""
+        return self._tasks[name].interval
+
+    def set_window_visible(self, visible):
+        if visible != self._visible:
+            self._visible = visible
+            self._apply_all()
+
+    def set_playing(self, playing):
+        if playing != self._playing:
+            self._playing = playing
+            self._apply_all()
+
+    def stop_all(self):
+        """停止所有任务（程序退出时调用），之后的状态变化不再启动任务"""
+        self._stopped = True
+        for task in self._tasks.values():
+            task.timer.stop()
+            task.interval = None
+
+    def _state(self):
+        state = "playing" if self._playing else "paused"
+        return state if self._visible else "hidden_" + state
+
+    def _apply_all(self):
+        for task in self._tasks.values():
+            task.suspended = False
+            self._apply(task)
+
+    def _apply(self, task):
+        active = task.enabled and not task.suspended and not self._stopped
+        interval = task.policy.get(self._state()) if active else None
+        if interval is None:
+            task.timer.stop()
+        elif interval != task.interval or not task.timer.isActive():
+            task.timer.start(int(interval))
+        task.interval = interval
+
+    def _run(self, task):
+        task.wakeups += 1
+        start = time.perf_counter()
+        try:
+            task.callback()
+        finally:
+            task.busy_seconds += time.perf_counter() - start
+            if self.metrics is not None:
+                self.metrics.count(f"wakeups.{task.name}")
+
+    def get_stats(self):
+        """获取各任务的唤醒统计"""
+        uptime = max(1e-6, time.monotonic() - self._started)
+        tasks = {
+            name: {
+                "interval_ms": task.interval,
+                "enabled": task.enabled,
+                "suspended": task.suspended,
+                "wakeups": task.wakeups,
+                "wakeups_per_second": task.wakeups / uptime,
+                "busy_ms": task.busy_seconds * 1000,
+            }
+            for name, task in self._tasks.items()
+        }
+        return {
+            "state": self._state(),
+            "uptime_seconds": uptime,
+            "total_wakeups": sum(task.wakeups for task in self._tasks.values()),
+            "tasks": tasks,
+        }
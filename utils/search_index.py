@@ -0,0 +1,118 @@
+import os
+import re
+
+try:
+    # 可选依赖：安装后可用拼音全拼或首字母搜索中文标题
+    from pypinyin import lazy_pinyin, Style
+except ImportError:
+    lazy_pinyin = None
+
+_CJK_RE = re.compile(r'[一-鿿]')
+
+
+def normalize_query(text):
+    """规范化搜索词：去掉首尾空白并转为小写"""
+    return text.strip().lower()
+
+
+class SearchIndex:
+    """
+    播放列表搜索索引。每个条目预先规范化为若干搜索键（小写的完整文件名，
+    安装了 pypinyin 时再加上中文的拼音全拼和首字母），并建立 n-gram 倒排索引：
+    查询时先用查询词的 n-gram 求交得到候选集，再逐个确认子串匹配。
+    """
+
+    def __init__(self, ngram=3):
+        self.ngram = ngram
+        self._keys = {}  # {路径: (搜索键, ...)}
+        self._grams = {}  # {n-gram: {路径, ...}}
+        self._key_cache = {}  # 路径的搜索键缓存，切换播放列表后无需重新计算拼音
+        self.built = False
+
+    def __contains__(self, path):
+        return path in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def build(self, paths):
+        """为一组路径重新建立索引"""
+        self.clear()
+        for path in paths:
+            self.add(path)
+        self.built = True
+
+    def clear(self):
+        self._keys = {}
+        self._grams = {}
+        self.built = False
+
+    def add(self, path):
+        if path in self._keys:
+            return
+        keys = self._search_keys(path)
+        self._keys[path] = keys
+        for gram in self._grams_of(keys):
+            self._grams.setdefault(gram, set()).add(path)
+
+    def remove(self, path):
+        keys = self._keys.pop(path, None)
+        if keys is None:
+            return
+        for gram in self._grams_of(keys):
+            paths = self._grams.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._grams[gram]
+
+    def matches(self, path, query):
+        """判断单个路径是否匹配（query 需已规范化）"""
+        keys = self._keys.get(path)
+        if keys is None:
+            keys = self._search_keys(path)
+        return any(query in key for key in keys)
+
+    def search(self, query, within=None):
+        """
+        返回匹配 query（需已规范化）的路径集合。
+        within 为上一次查询的结果：新查询包含旧查询时，只需在旧结果中继续收窄。
+        """
+        candidates = None
+        if len(query) >= self.ngram:
+            for gram in sorted(self._grams_of((query,)), key=lambda g: len(self._grams.get(g, ()))):
+                paths = self._grams.get(gram)
+                if not paths:
+                    return set()
+                candidates = set(paths) if candidates is None else candidates & paths
+                if not candidates:
+                    return set()
+        if within is not None and (candidates is None or len(within) < len(candidates)):
+            candidates = within
+        if candidates is None:
+            candidates = self._keys.keys()
+        keys = self._keys
+        return {path for path in candidates if path in keys and any(query in key for key in keys[path])}
+
+    def _search_keys(self, path):
+        keys = self._key_cache.get(path)
+        if keys is None:
+            # 完整文件名（包括扩展名，可以按 "mp3"、".flac" 搜索）
+            name = os.path.basename(path).lower()
+            keys = [name]
+            if lazy_pinyin is not None and _CJK_RE.search(name):
+                stem = os.path.splitext(name)[0]
+                syllables = lazy_pinyin(stem, errors='default')
+                keys.append("".join(syllables))
+                keys.append("".join(lazy_pinyin(stem, style=Style.FIRST_LETTER, errors='default')))
+            keys = tuple(keys)
+            self._key_cache[path] = keys
+        return keys
+
+    def _grams_of(self, keys):
+        n = self.ngram
+        grams = set()
+        for key in keys:
+            for i in range(len(key) - n + 1):
+                grams.add(key[i:i + n])
+        return grams
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SettingsStore:
+    """
+    播放器设置的存储。修改设置后只标记为"脏"，由调用方在一段静默期后
+    调用 flush_async() 在后台线程写入；多次修改合并为一次写入。
+    写入先写临时文件再用 os.replace 替换，进程崩溃也不会留下截断的设置文件。
+    """
+
+    def __init__(self, path, defaults=None):
+        self.path = path
+        self.defaults = dict(defaults or {})
+        self.data = {}  # 设置字典，调用方直接读写，修改后调用 mark_dirty()
+        self.dirty = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="settings-writer")
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # 保证同一时刻只有一个写入
+        self._pending = None  # 等待写入的最新快照，写入线程只写最新的一份
+        self._writing = False
+        self._closed = False
+        self.write_count = 0  # 实际写入磁盘的次数
+        self.failed_writes = 0
+        self.coalesced = 0  # 被更新的快照取代、未单独写入的次数
+        self.last_write_ms = 0.0
+
+    def load(self):
+        """从文件加载设置，文件不存在或损坏时使用默认值"""
+        data = None
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"读取设置失败，使用默认设置: {e}", file=sys.stderr)
+        self.data.clear()
+        self.data.update(data if isinstance(data, dict) else self.defaults)
+        self.dirty = False
+        return self.data
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def flush_async(self):
+        """有未保存的修改时，把当前设置的快照交给后台线程写入"""
+        if not self.dirty or self._closed:
+            return False
+        snapshot = dict(self.data)
+        self.dirty = False
+        with self._lock:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = snapshot
+            if self._writing:
+                return True
+            self._writing = True
+        self._executor.submit(self._drain)
+        return True
+
+    def close(self):
+        """等待后台写入完成，并同步写入尚未保存的修改（程序退出时调用）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            snapshot = self._pending
+            self._pending = None
+        if self.dirty:
+            snapshot = dict(self.data)
+            self.dirty = False
+        if snapshot is not None:
+            self._write(snapshot)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                snapshot = self._pending
+                self._pending = None
+                if snapshot is None:
+                    self._writing = False
+                    return
+            self._write(snapshot)
+
+    def _write(self, snapshot):
+        start = time.perf_counter()
+        temp_path = self.path + ".tmp"
+        with self._write_lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+                self.write_count += 1
+            except (OSError, TypeError, ValueError) as e:
+                self.failed_writes += 1
+                print(f"无法保存设置: {e}", file=sys.stderr)
+            self.last_write_ms = (time.perf_counter() - start) * 1000
+
+    def get_stats(self):
+        """获取写入统计"""
+        return {
+            "writes": self.write_count,
+            "failed_writes": self.failed_writes,
+            "coalesced": self.coalesced,
+            "dirty": self.dirty,
+            "last_write_ms": self.last_write_ms,
+        }
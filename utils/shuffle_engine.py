@@ -0,0 +1,213 @@
+import random
+
+
+class ShuffleEngine:
+    """
+    随机播放顺序。按需逐个抽取（惰性的 Fisher–Yates）：每一轮把所有曲目各播放一次后才开始下一轮，
+    已抽取的顺序保存在 order 中，下一首和上一首都是常数时间。
+    播放列表新增的曲目放入本轮尚未抽取的池中，移除的曲目从顺序和池中去掉，已有顺序不会被打乱。
+    """
+
+    def __init__(self, history_limit=200, rng=None):
+        self.history_limit = history_limit  # 上一轮保留的可回退曲目数
+        self._rng = rng or random.Random()
+        self.playlist_name = None
+        self._order = []  # 已抽取的播放顺序（包括上一轮保留的部分）
+        self._position = -1  # 当前曲目在 order 中的位置
+        self._cycle_start = 0  # 本轮在 order 中开始的位置
+        self._drawn = set()  # 本轮已抽取的曲目
+        self._pool = []  # 本轮尚未抽取的曲目
+        self._pool_index = {}  # 曲目 → 在 pool 中的下标，用于常数时间移除
+
+    # --- 与播放列表同步 ---
+    def reset(self, playlist_name, paths, current=None):
+        """切换到新的播放列表，重新开始一轮（current 为正在播放的曲目）"""
+        self.playlist_name = playlist_name
+        self._order = []
+        self._position = -1
+        self._cycle_start = 0
+        self._drawn = set()
+        self._set_pool(paths)
+        if current is not None and current in self._pool_index:
+            self.jump(current)
+
+    def sync(self, paths):
+        """播放列表被整体重新读取后，与当前内容对齐（保留已有顺序）"""
+        present = set(paths)
+        self._filter_order(present)
+        self._drawn = set(self._order[self._cycle_start:])
+        self._set_pool(path for path in paths if path not in self._drawn)
+
+    def insert(self, path):
+        """播放列表新增曲目：放入本轮尚未抽取的池中"""
+        if path not in self._drawn and path not in self._pool_index:
+            self._pool_add(path)
+
+    def remove(self, path):
+        """播放列表移除曲目"""
+        self._pool_remove(path)
+        if path in self._drawn or path in self._order:
+            self._drawn.discard(path)
+            self._filter_order(None, path)
+
+    # --- 播放顺序 ---
+    def current(self):
+        if 0 <= self._position < len(self._order):
+            return self._order[self._position]
+        return None
+
+    def peek_next(self, skip=None):
+        """
+        查看下一首，没有曲目时返回 None。不移动当前位置：必要时只是提前抽取，
+        之后以同样的 skip 调用 next() 返回的是同一首。skip(path) 为真的曲目（例如已知不存在的文件）跳过。
+        """
+        index = self._next_index(skip)
+        return self._order[index] if index is not None else None
+
+    def next(self, skip=None):
+        index = self._next_index(skip)
+        if index is None:
+            return None
+        self._position = index
+        return self._order[index]
+
+    def previous(self):
+        """回到上一首实际播放过的曲目，没有历史时返回 None"""
+        if self._position > 0:
+            self._position -= 1
+            return self._order[self._position]
+        return None
+
+    def jump(self, path):
+        """直接播放某首曲目（例如双击）：预先抽取但尚未播放的曲目放回池中"""
+        if self.current() == path:
+            return
+        for pending in self._order[self._position + 1:]:
+            if pending in self._drawn and pending not in self._order[self._cycle_start:self._position + 1]:
+                self._drawn.discard(pending)
+                self._pool_add(pending)
+        del self._order[self._position + 1:]
+        self._cycle_start = min(self._cycle_start, len(self._order))
+        if path in self._pool_index:
+            self._pool_remove(path)
+            self._drawn.add(path)
+        self._order.append(path)
+        self._position = len(self._order) - 1
+
+    # --- 持久化 ---
+    def to_state(self):
+        return {
+            "playlist": self.playlist_name,
+            "order": list(self._order),
+            "position": self._position,
+            "cycle_start": self._cycle_start,
+        }
+
+    def restore(self, state, playlist_name, paths):
+        """从保存的状态恢复；状态属于其他播放列表或格式不对时重新开始"""
+        try:
+            if state.get("playlist") != playlist_name:
+                raise ValueError(state.get("playlist"))
+            order = [path for path in state["order"] if isinstance(path, str)]
+            position = min(int(state.get("position", -1)), len(order) - 1)
+            cycle_start = max(0, min(int(state.get("cycle_start", 0)), len(order)))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            self.reset(playlist_name, paths)
+            return False
+        self.playlist_name = playlist_name
+        self._order = order
+        self._position = position
+        self._cycle_start = cycle_start
+        self.sync(paths)
+        return True
+
+    # --- 内部实现 ---
+    def _next_index(self, skip):
+        """下一首在 order 中的位置（按需抽取），所有曲目都被跳过时返回 None"""
+        index = self._position + 1
+        # 最多检查已抽取未播放的部分加上一整轮
+        for _ in range(len(self._order) - index + len(self._drawn) + len(self._pool) + 1):
+            if index >= len(self._order):
+                path = self._draw()
+                if path is None:
+                    return None
+                # 开始新一轮时可能裁剪了历史，按追加后的位置重新定位
+                self._order.append(path)
+                index = len(self._order) - 1
+            if skip is None or not skip(self._order[index]):
+                return index
+            index += 1
+        return None
+
+    def _draw(self):
+        deferred = None
+        if not self._pool:
+            if not self._drawn:
+                return None
+            deferred = self._start_cycle()
+        index = self._rng.randrange(len(self._pool))
+        path = self._pool[index]
+        self._pool_remove(path)
+        self._drawn.add(path)
+        if deferred is not None:
+            # 上一轮最后播放的曲目不作为新一轮的第一首，抽取后再放回池中
+            self._pool_add(deferred)
+        return path
+
+    def _start_cycle(self):
+        """本轮所有曲目都已抽取，开始新的一轮；返回暂不参与第一次抽取的曲目"""
+        last = self._order[-1] if self._order else None
+        tracks = self._drawn
+        self._drawn = set()
+        self._set_pool(path for path in tracks if path != last)
+        deferred = None
+        if last in tracks:
+            if self._pool:
+                deferred = last
+            else:
+                self._pool_add(last)  # 列表中只有一首
+        # 只保留有限的历史供"上一首"回退
+        self._cycle_start = len(self._order)
+        trim = max(0, min(self._cycle_start, self._position) - self.history_limit)
+        if trim:
+            del self._order[:trim]
+            self._position -= trim
+            self._cycle_start -= trim
+        return deferred
+
+    def _filter_order(self, present=None, removed=None):
+        """从 order 中去掉不再存在的曲目，同时修正 position 和 cycle_start"""
+        order = []
+        position = -1
+        cycle_start = None
+        for i, path in enumerate(self._order):
+            if i == self._cycle_start and cycle_start is None:
+                cycle_start = len(order)
+            keep = path != removed if present is None else path in present
+            if keep:
+                order.append(path)
+            if i <= self._position:
+                position = len(order) - 1
+        self._order = order
+        self._position = position
+        self._cycle_start = len(order) if cycle_start is None else cycle_start
+
+    def _set_pool(self, paths):
+        self._pool = []
+        self._pool_index = {}
+        for path in paths:
+            if path not in self._pool_index:
+                self._pool_add(path)
+
+    def _pool_add(self, path):
+        self._pool_index[path] = len(self._pool)
+        self._pool.append(path)
+
+    def _pool_remove(self, path):
+        index = self._pool_index.pop(path, None)
+        if index is None:
+            return
+        last = self._pool.pop()
+        if index < len(self._pool):
+            self._pool[index] = last
+            self._pool_index[last] = index
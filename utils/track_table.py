@@ -0,0 +1,129 @@
+from array import array
+
+
+class TrackTable:
+    """
+    曲目表：每个文件路径只保存一份，并分配一个整数ID。
+    所有播放列表共用同一张表，列表中只保存ID。
+    ID 按播放列表中的出现次数计数，不再被任何列表引用时释放路径，ID 留给之后的新曲目复用。
+    """
+
+    def __init__(self):
+        self._paths = []  # ID → 路径（已释放的ID为 None）
+        self._ids = {}  # 路径 → ID
+        self._refs = []  # ID → 包含该曲目的播放列表数
+        self._free = []  # 已释放、可复用的ID
+
+    def __len__(self):
+        return len(self._ids)
+
+    def intern(self, path):
+        """获取路径的ID，路径第一次出现时分配新ID（需随后由播放列表 retain）"""
+        track_id = self._ids.get(path)
+        if track_id is None:
+            if self._free:
+                track_id = self._free.pop()
+                self._paths[track_id] = path
+                self._refs[track_id] = 0
+            else:
+                track_id = len(self._paths)
+                self._paths.append(path)
+                self._refs.append(0)
+            self._ids[path] = track_id
+        return track_id
+
+    def id_of(self, path):
+        """获取路径的ID，路径从未出现过（或已释放）时返回 None"""
+        return self._ids.get(path)
+
+    def path(self, track_id):
+        return self._paths[track_id]
+
+    def retain(self, track_ids):
+        """曲目被加入一个播放列表"""
+        refs = self._refs
+        for track_id in track_ids:
+            refs[track_id] += 1
+
+    def release(self, track_ids):
+        """曲目被移出一个播放列表，不再被引用时释放"""
+        refs = self._refs
+        for track_id in track_ids:
+            refs[track_id] -= 1
+            if refs[track_id] <= 0:
+                del self._ids[self._paths[track_id]]
+                self._paths[track_id] = None
+                self._free.append(track_id)
+
+
+class Playlist:
+    """
+    一个播放列表：按顺序保存曲目ID（紧凑的 array），另有ID集合用于常数时间的成员判断。
+    按下标访问和遍历时返回路径，可以像路径列表一样使用。
+    """
+
+    def __init__(self, table, paths=()):
+        self.table = table
+        self.ids = array('I')
+        self.members = set()
+        self.extend([table.intern(path) for path in paths])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        return self.table.path(self.ids[row])
+
+    def __iter__(self):
+        path = self.table.path
+        return (path(track_id) for track_id in self.ids)
+
+    def __contains__(self, path):
+        track_id = self.table.id_of(path)
+        return track_id is not None and track_id in self.members
+
+    def id_at(self, row):
+        return self.ids[row]
+
+    def paths(self):
+        """全部路径（新列表）"""
+        return list(self)
+
+    def extend(self, track_ids):
+        """在末尾追加曲目（已在列表中的和重复的跳过），返回实际追加的ID列表"""
+        added = []
+        members = self.members
+        for track_id in track_ids:
+            if track_id not in members:
+                members.add(track_id)
+                added.append(track_id)
+        self.ids.extend(added)
+        self.table.retain(added)
+        return added
+
+    def remove(self, track_ids):
+        """移除一组曲目（一次遍历），返回按原顺序实际移除的路径列表"""
+        targets = self.members.intersection(track_ids)
+        if not targets:
+            return []
+        if len(targets) == 1:
+            removed = list(targets)
+            self.ids.remove(removed[0])
+        else:
+            removed = [track_id for track_id in self.ids if track_id in targets]
+            self.ids = array('I', [track_id for track_id in self.ids if track_id not in targets])
+        self.members -= targets
+        # 先取出路径再释放，释放后ID可能被复用
+        paths = [self.table.path(track_id) for track_id in removed]
+        self.table.release(removed)
+        return paths
+
+    def clear(self):
+        """移除全部曲目（删除播放列表时调用，释放曲目表中的引用）"""
+        self.table.release(self.ids)
+        self.ids = array('I')
+        self.members = set()
+
+    def move(self, old_index, new_index):
+        track_id = self.ids.pop(old_index)
+        self.ids.insert(new_index, track_id)
@@ -1,9 +1,10 @@
 import numpy as np
 import pyqtgraph as pg
 import time
-from PyQt6.QtWidgets import QWidget, QSlider, QListWidget
-from PyQt6.QtCore import Qt, pyqtSignal, QSize, QPoint
-from PyQt6.QtGui import QPainter, QLinearGradient, QColor, QPen
+from collections import deque
+from PyQt6.QtWidgets import QWidget, QSlider, QListWidget, QLabel
+from PyQt6.QtCore import Qt, pyqtSignal, QSize, QPoint, QRectF, QTimer
+from PyQt6.QtGui import QPainter, QLinearGradient, QColor, QPen, QPixmap
 from .config import Config
 
 
@@ -14,8 +15,62 @@ class EventLoggingWidget(QWidget):
         super().mousePressEvent(event)
 
 
+class SpectrumBarsItem(pg.GraphicsObject):
+    """
+    在一次绘制中画出所有频谱条的图形项。
+    端点坐标保存在预分配的数组中，颜色相同的频谱条合并为一条路径，每种画笔只绘制一次。
+    """
+
+    def __init__(self, num_bars, extent):
+        super().__init__()
+        self._segments = np.zeros((num_bars, 2, 2))  # 每条频谱条的 (内端点, 外端点) 坐标
+        self._pen_indices = np.zeros(num_bars, dtype=np.intp)
+        self._pens = []
+        # 显示范围固定，边界不随数据变化，避免每帧重新计算
+        self._bounds = QRectF(-extent, -extent, 2 * extent, 2 * extent)
+        self.paint_time = 0.0  # 最近一次绘制耗时（秒）
+        self.paint_times = None  # 可选的 deque，每次实际绘制追加一个耗时样本
+        self.metrics = None  # 可选的性能统计（PerfMetrics）
+
+    def set_bars(self, inner_x, inner_y, outer_x, outer_y, pen_indices, pens):
+        """更新所有频谱条的端点和画笔（pens[pen_indices[i]] 为第 i 条的画笔）"""
+        segments = self._segments
+        segments[:, 0, 0] = inner_x
+        segments[:, 0, 1] = inner_y
+        segments[:, 1, 0] = outer_x
+        segments[:, 1, 1] = outer_y
+        self._pen_indices[:] = pen_indices
+        self._pens = pens
+        self.update()
+
+    def boundingRect(self):
+        return self._bounds
+
+    def paint(self, painter, option, widget=None):
+        if not self._pens:
+            # 第一次 set_bars() 之前可能已经被绘制
+            return
+        start = time.perf_counter()
+        if pg.getConfigOption('antialias'):
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        # 按画笔分组，每组构造一条由线段对组成的路径
+        order = np.argsort(self._pen_indices, kind='stable')
+        splits = np.flatnonzero(np.diff(self._pen_indices[order])) + 1
+        for group in np.split(order, splits):
+            if len(group) == 0:
+                continue
+            points = self._segments[group].reshape(-1, 2)
+            painter.setPen(self._pens[self._pen_indices[group[0]]])
+            painter.drawPath(pg.arrayToQPath(points[:, 0], points[:, 1], connect='pairs'))
+        self.paint_time = time.perf_counter() - start
+        if self.paint_times is not None:
+            self.paint_times.append(self.paint_time)
+        if self.metrics is not None:
+            self.metrics.record("paint", self.paint_time)
+
+
 class SpectrumWidget(pg.GraphicsLayoutWidget):
-    def __init__(self, config):
+    def __init__(self, config, metrics=None):
         self.config = config
         super().__init__()
         self.setBackground(None)
@@ -31,27 +86,51 @@ class SpectrumWidget(pg.GraphicsLayoutWidget):
         self.plot_item.setYRange(-plot_range, plot_range, padding=0)
         self.color_map = pg.ColorMap(self.config.COLOR_POSITIONS, np.array(self.config.COLOR_MAP_COLORS))
         
-        # 优化：预创建所有 PlotDataItem 并缓存画笔
-        self.bar_items = []
-        self._cached_pens = {}  # 缓存画笔对象以避免重复创建
-        for _ in range(self.config.NUM_BARS):
-            item = pg.PlotDataItem()
-            self.plot_item.addItem(item)
-            self.bar_items.append(item)
-
-        self.angles_rad_base = np.pi / 2 + np.linspace(0, 2 * np.pi, self.config.NUM_BARS, endpoint=False)
-        self._last_display_heights = np.zeros(self.config.NUM_BARS)
+        # 颜色查找表：把归一化高度量化为固定级数，每级的画笔只创建一次，内存占用恒定
+        self._color_levels = self.config.COLOR_LUT_LEVELS
+        self.color_lut = self.color_map.getLookupTable(0.0, 1.0, self._color_levels, alpha=True)
+        self._pen_atlas = [
+            pg.mkPen(color=tuple(int(c) for c in rgba), width=self.config.BAR_WIDTH)
+            for rgba in self.color_lut
+        ]
+
+        # 所有频谱条由一个图形项在一次绘制中画出
+        self._plot_range = plot_range
+        self._metrics = metrics
+        self._paint_times = deque(maxlen=120)  # 最近每次实际绘制的耗时（由图形项在绘制时追加）
+        self.bars_item = None
+        self.set_num_bars(self.config.NUM_BARS)
         self.start_time = 0
+        self._update_times = deque(maxlen=120)  # 最近每帧的数据更新耗时
+        self._frame_stamps = deque(maxlen=120)  # 最近每帧的更新时刻
         self.setBackground(None)
         self.setStyleSheet("background: transparent;")
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
 
+    def set_num_bars(self, num_bars):
+        """设置显示的频谱条数（运行时切换性能档位时调用）"""
+        if self.bars_item is not None:
+            if num_bars == self.num_bars:
+                return
+            self.plot_item.removeItem(self.bars_item)
+        self.num_bars = num_bars
+        self.bars_item = SpectrumBarsItem(num_bars, self._plot_range)
+        self.bars_item.metrics = self._metrics
+        self.bars_item.paint_times = self._paint_times
+        self.plot_item.addItem(self.bars_item)
+        self.angles_rad_base = np.pi / 2 + np.linspace(0, 2 * np.pi, num_bars, endpoint=False)
+        self._last_display_heights = np.zeros(num_bars)
+
     def resizeEvent(self, event):
         # 尺寸调整时不再需要特殊处理，因为画笔宽度在update_spectrum中设置
         super().resizeEvent(event)
 
     def update_spectrum(self, heights, start_time):
+        frame_start = time.perf_counter()
         config = self.config
+        if len(heights) != self.num_bars:
+            # 切换条数前已经生成的旧帧
+            return
         # heights_clipped = np.clip(heights, 0, config.MAX_DB_VALUE)
         
         radii_outer = (
@@ -59,7 +138,7 @@ class SpectrumWidget(pg.GraphicsLayoutWidget):
             + config.MIN_RADIUS_OFFSET
             + (config.MAX_AMPLITUDE_RADIUS / config.MAX_DB_VALUE) * heights
         )
-        if config.NUM_BARS > 1:
+        if self.num_bars > 1:
             avg_radius_edge = (radii_outer[0] + radii_outer[-1]) / 2.0
             radii_outer[-1] = avg_radius_edge
             
@@ -69,8 +148,9 @@ class SpectrumWidget(pg.GraphicsLayoutWidget):
         current_cos = np.cos(current_angles)
         current_sin = np.sin(current_angles)
         
+        # 颜色映射只是一次向量化的整数索引
         normalized_heights = heights / config.MAX_DB_VALUE
-        bar_q_colors = self.color_map.mapToQColor(normalized_heights)
+        levels = np.clip(np.rint(normalized_heights * (self._color_levels - 1)), 0, self._color_levels - 1).astype(np.intp)
         
         # 优化：批量计算所有坐标
         inner_x = config.INNER_RADIUS * current_cos
@@ -78,26 +158,74 @@ class SpectrumWidget(pg.GraphicsLayoutWidget):
         outer_x = radii_outer * current_cos
         outer_y = radii_outer * current_sin
         
-        # 优化：只更新数据，使用缓存的画笔避免重复创建
-        for i in range(config.NUM_BARS):
-            # 获取或创建缓存的画笔
-            color_key = (bar_q_colors[i].red(), bar_q_colors[i].green(), 
-                        bar_q_colors[i].blue(), bar_q_colors[i].alpha())
-            if color_key not in self._cached_pens:
-                self._cached_pens[color_key] = pg.mkPen(color=bar_q_colors[i], width=self.config.BAR_WIDTH)
-            
-            # 一次性设置所有数据
-            x_data = [inner_x[i], outer_x[i]]
-            y_data = [inner_y[i], outer_y[i]]
-            self.bar_items[i].setData(x=x_data, y=y_data, pen=self._cached_pens[color_key])
+        # 一次性提交所有频谱条的数据
+        self.bars_item.set_bars(inner_x, inner_y, outer_x, outer_y, levels, self._pen_atlas)
+        self._update_times.append(time.perf_counter() - frame_start)
+        self._frame_stamps.append(frame_start)
+
+    def get_frame_stats(self):
+        """获取频谱绘制的帧时间统计（毫秒）和实际帧率"""
+        def avg_ms(values):
+            return sum(values) / len(values) * 1000 if values else 0.0
+        stamps = self._frame_stamps
+        span = stamps[-1] - stamps[0] if len(stamps) > 1 else 0.0
+        return {
+            "bars": self.num_bars,
+            "update_ms": avg_ms(self._update_times),
+            "paint_ms": avg_ms(self._paint_times),
+            "fps": (len(stamps) - 1) / span if span > 0 else 0.0,
+        }
+
+
+class PerfOverlay(QLabel):
+    """显示性能统计的半透明覆盖层，只在可见时定时刷新"""
+
+    def __init__(self, metrics, parent=None, interval_ms=500):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.setStyleSheet(
+            "background: rgba(0, 0, 0, 160); color: white; padding: 6px;"
+            "font-family: Consolas, monospace; font-size: 11px;"
+        )
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        """切换覆盖层的显示"""
+        if self.isVisible():
+            self._timer.stop()
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start()
+
+    def refresh(self):
+        self.setText(self.metrics.format_text())
+        self.adjustSize()
 
 
 class GradientWidget(QWidget):
-    def __init__(self, parent=None):
+    """
+    动画渐变背景。渐变先按缩小的尺寸渲染到缓存的像素图中，绘制时直接贴图；
+    颜色按固定级数量化，只有量化后的颜色真正变化时才重绘。
+    重绘背景时叠在上面的子部件也会重绘，相位的推进频率由 BACKGROUND_FPS 限制。
+    """
+
+    def __init__(self, parent=None, metrics=None):
         super().__init__(parent)
         self._bg_phase = 0
-        # 设置自动填充背景
-        self.setAutoFillBackground(True)
+        self._colors = self._quantized_colors(0)
+        self._cache = None  # 缓存的渐变像素图，颜色或尺寸变化时重新渲染
+        self.metrics = metrics  # 可选的性能统计（PerfMetrics），记录每次重绘耗时
+        self.paint_time = 0.0  # 最近一次重绘耗时（秒）
+        self.repaint_count = 0
+        # 背景由缓存完整覆盖，无需先擦除
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, True)
         # 初始化时立即更新一次背景
         self.update()
 
@@ -108,23 +236,58 @@ class GradientWidget(QWidget):
     @bg_phase.setter
     def bg_phase(self, value):
         self._bg_phase = value
-        self.update()
+        colors = self._quantized_colors(value)
+        if colors != self._colors:
+            self._colors = colors
+            self._cache = None
+            self.update()
+
+    @staticmethod
+    def _quantized_colors(phase):
+        """计算两端颜色的色相，并量化到固定级数"""
+        steps = Config.BACKGROUND_HUE_STEPS
+        h1 = round(((0.6 + 0.2 * np.sin(phase)) % 1) * steps) / steps
+        h2 = round(((0.9 + 0.2 * np.cos(phase)) % 1) * steps) / steps
+        return h1 % 1, h2 % 1
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         # 大小改变时更新背景
+        self._cache = None
         self.update()
 
+    def _render_cache(self):
+        """把渐变渲染到缩小的像素图中（渐变是平滑的，放大显示不影响观感）"""
+        scale = Config.BACKGROUND_CACHE_SCALE
+        width = max(1, int(self.width() * scale))
+        height = max(1, int(self.height() * scale))
+        pixmap = QPixmap(width, height)
+        painter = QPainter(pixmap)
+        # 确保渐变覆盖整个窗口
+        grad = QLinearGradient(0, 0, width, height)
+        grad.setColorAt(0, QColor.fromHsvF(self._colors[0], 0.5, 1, 1))
+        grad.setColorAt(1, QColor.fromHsvF(self._colors[1], 0.5, 1, 1))
+        painter.fillRect(pixmap.rect(), grad)
+        painter.end()
+        return pixmap
+
     def paintEvent(self, event):
+        start = time.perf_counter()
+        if self._cache is None or self._cache.isNull():
+            self._cache = self._render_cache()
         painter = QPainter(self)
-        # 确保渐变覆盖整个窗口
-        grad = QLinearGradient(0, 0, self.width(), self.height())
-        c1 = QColor.fromHsvF((0.6 + 0.2 * np.sin(self._bg_phase)) % 1, 0.5, 1, 1)
-        c2 = QColor.fromHsvF((0.9 + 0.2 * np.cos(self._bg_phase)) % 1, 0.5, 1, 1)
-        grad.setColorAt(0, c1)
-        grad.setColorAt(1, c2)
-        # 使用渐变填充整个窗口
-        painter.fillRect(self.rect(), grad)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        # 只绘制需要更新的区域
+        target = QRectF(event.rect())
+        sx = self._cache.width() / max(1, self.width())
+        sy = self._cache.height() / max(1, self.height())
+        source = QRectF(target.x() * sx, target.y() * sy, target.width() * sx, target.height() * sy)
+        painter.drawPixmap(target, self._cache, source)
+        painter.end()
+        self.paint_time = time.perf_counter() - start
+        self.repaint_count += 1
+        if self.metrics is not None:
+            self.metrics.record("background_paint", self.paint_time)
 
 
 class CircularProgressBar(QWidget):